@@ -0,0 +1,99 @@
+"""Background saves of the book while the interactive menu runs.
+
+The book is saved once it has had no changes for DELAY seconds, and at most
+once every INTERVAL seconds. The save runs on a worker thread, so the menu
+never waits for it; while a saver is attached the book also leaves folding
+a long journal into the snapshot to these saves. Handlers run while holding
+`lock`, so a save never sees a half-applied change.
+"""
+import signal
+import sys
+import threading
+import time
+
+DELAY = 2.0
+INTERVAL = 30.0
+
+# ORGANIZER_AUTOSAVE=0 turns autosave off
+ENV_VAR = "ORGANIZER_AUTOSAVE"
+
+
+def _exit_on_signal(signum, frame):
+    # Unwind like Ctrl-C does, so the final flush in the menu loop runs
+    sys.exit(128 + signum)
+
+
+class AutoSaver:
+    def __init__(self, book, save, delay: float = DELAY, interval: float = INTERVAL):
+        """save is called with no arguments to write the snapshot, e.g. handlers.save_data for book."""
+        self.book = book
+        self.delay = delay
+        self.interval = interval
+        self.lock = threading.RLock()
+        self._save = save
+        self._wake = threading.Condition()
+        self._last_change = None  # monotonic time of the latest change not saved yet
+        self._last_save = float("-inf")
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="organizer-autosave", daemon=True)
+
+    def start(self) -> 'AutoSaver':
+        self.book._on_change = self.touch
+        if self.book.dirty:
+            self.touch()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, _exit_on_signal)
+        self._thread.start()
+        return self
+
+    def touch(self):
+        """Called by the book on every change."""
+        with self._wake:
+            self._last_change = time.monotonic()
+            self._wake.notify()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._stopped:
+                    if self._last_change is None:
+                        self._wake.wait()
+                        continue
+                    # Debounce: wait for a quiet period, and keep saves INTERVAL apart
+                    due = max(self._last_change + self.delay, self._last_save + self.interval)
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wake.wait(remaining)
+                if self._stopped:
+                    return
+            self.flush()
+
+    def flush(self) -> bool:
+        """Write a snapshot now if the book has unsaved changes; True if one was written."""
+        with self.lock:
+            with self._wake:
+                self._last_change = None
+            if not self.book.dirty:
+                return False
+            try:
+                self._save()
+            except OSError as e:
+                print(f"Autosave failed: {e}", file=sys.stderr)
+                # Retry after INTERVAL instead of at once
+                with self._wake:
+                    self._last_change = time.monotonic()
+                return False
+            finally:
+                self._last_save = time.monotonic()
+            return True
+
+    def close(self) -> bool:
+        """Stop the worker and write any changes still pending."""
+        with self._wake:
+            self._stopped = True
+            self._wake.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.book._on_change = None
+        return self.flush()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""organizer-bench: time the main Organizer operations on generated books of several sizes.
+
+Results are printed as a table on stderr and written as JSON (stdout or
+--output), one entry per benchmark and size, so runs can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from organizer import handlers
+from organizer.birthday_engine import np
+from organizer.entities import Organizer
+from organizer.seed import TAGS, WORDS, generate_organizer
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def _timed(fn, runs: int) -> list:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _quiet(fn):
+    """Run fn with stdout sent to /dev/null (not a tty, so listings are not paged)."""
+    def run():
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            fn()
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    return run
+
+
+def _answering(fn, answer: str):
+    """Run an interactive handler with its prompt answered by answer."""
+    def run():
+        prompt = handlers.safe_input
+        handlers.safe_input = lambda *args, **kwargs: answer
+        try:
+            fn()
+        finally:
+            handlers.safe_input = prompt
+    return run
+
+
+def cases(book: Organizer, path: str, seed: int) -> list:
+    """(name, callable, operations per call) for every benchmark on book."""
+    rng = random.Random(seed)
+    names = rng.sample(list(book.contacts), min(1000, len(book.contacts)))
+    queries = [name.split()[1][:4].lower() for name in names[:5]]
+    typos = [name[:3] + name[4:] for name in names[:20]]
+    words = [WORDS[0], WORDS[10], WORDS[-1], "deadline client", "xyzzy"]
+    tags = [TAGS[0], TAGS[5], TAGS[-1], "fin", "nosuchtag"]
+
+    def load_and_search():
+        loaded = Organizer.load(path)
+        loaded.find_notes_by_text(words[1])
+
+    # The text indexes are built on the first search, load_then_text_search times that;
+    # the search benchmarks below measure queries only (the name BK-tree is built in
+    # the first fuzzy_contacts run, which best_s leaves out)
+    book._text_indexes()
+    return [
+        ("save", lambda: book.save(path, split_notes=True), 1),
+        ("load", lambda: Organizer.load(path), 1),
+        ("load_then_text_search", load_and_search, 1),
+        ("find_contact", lambda: [book.find_contact(name.upper()) for name in names], len(names)),
+        ("search_contact", lambda: [_answering(lambda: handlers.search_contact(book), query)()
+                                    for query in queries], len(queries)),
+        ("fuzzy_contacts", lambda: [book.fuzzy_contacts(typo) for typo in typos], len(typos)),
+        ("get_upcoming_birthdays_7", lambda: book.get_upcoming_birthdays(7), 1),
+        ("get_upcoming_birthdays_30", lambda: book.get_upcoming_birthdays(30), 1),
+        ("find_notes_by_text", lambda: [book.find_notes_by_text(word) for word in words], len(words)),
+        ("rank_notes", lambda: [book.rank_notes(word) for word in words], len(words)),
+        ("find_notes_by_tags", lambda: [book.find_notes_by_tags(tag) for tag in tags], len(tags)),
+        ("find_note_titles_by_tags", lambda: book.find_note_titles_by_tags(tags[:2], match_all=True), 1),
+        ("show_all", _quiet(lambda: handlers.show_all(book)), 1),
+    ]
+
+
+def run(sizes, notes_ratio: float = 0.1, runs: int = 3, seed: int = 42, only=None) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "organizer.pkl")
+        for size in sizes:
+            start = time.perf_counter()
+            book = generate_organizer(size, int(size * notes_ratio), seed)
+            print(f"{size:>9} contacts generated in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+            for name, fn, operations in cases(book, path, seed):
+                if only and name not in only:
+                    continue
+                times = _timed(fn, runs)
+                result = {
+                    "benchmark": name,
+                    "contacts": len(book.contacts),
+                    "notes": len(book.notes),
+                    "runs": runs,
+                    "operations": operations,
+                    "best_s": min(times),
+                    "median_s": statistics.median(times),
+                    "per_operation_us": min(times) / operations * 1e6,
+                }
+                if name == "save":
+                    result["pickle_bytes"] = os.path.getsize(path)
+                results.append(result)
+                print(f"{size:>9} {name:<28} best {min(times):9.4f}s  "
+                      f"{result['per_operation_us']:12.1f} us/op", file=sys.stderr)
+            del book
+
+    return {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np is not None,
+        "seed": seed,
+        "notes_ratio": notes_ratio,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="organizer-bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="contacts per book")
+    parser.add_argument("--notes-ratio", type=float, default=0.1, help="notes per contact (default 0.1)")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per benchmark, the best counts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", metavar="BENCHMARK", help="run only these benchmarks")
+    parser.add_argument("-o", "--output", help="JSON results file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.notes_ratio, args.runs, args.seed, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Vectorized upcoming-birthday computation for very large books (requires NumPy)."""
+from datetime import date
+
+from organizer.entities import MONTH_STARTS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, Organizer falls back to the Python index
+    np = None
+
+# numpy.datetime64 counts days from 1970-01-01, which was a Thursday
+_EPOCH_WEEKDAY = 3
+
+
+class BirthdayArray:
+    """Birthdays of a book as flat arrays: calendar day, insertion order and name."""
+
+    def __init__(self, entries: list):
+        # entries are (calendar_day, seq, name) tuples, see Organizer._birthday_index
+        self.names = np.array([name for _, _, name in entries], dtype=object)
+        self.seqs = np.fromiter((seq for _, seq, _ in entries), dtype=np.int64, count=len(entries))
+        calendar_days = np.fromiter((day for day, _, _ in entries), dtype=np.int16, count=len(entries))
+
+        starts = np.array(MONTH_STARTS, dtype=np.int16)
+        self.months = np.searchsorted(starts, calendar_days, side='right') - 1
+        self.days = calendar_days - starts[self.months] + 1
+
+    def _dates_in_year(self, year: int):
+        month_starts = np.arange(f'{year}-01', f'{year + 1}-02', dtype='datetime64[M]').astype('datetime64[D]')
+        month_lengths = np.diff(month_starts).astype(np.int64)
+        # clip puts 29 February on the 28th in non-leap years
+        days = np.minimum(self.days, month_lengths[self.months])
+        return month_starts[self.months] + (days - 1)
+
+    def upcoming(self, today: date, days: int) -> list:
+        today64 = np.datetime64(today, 'D')
+        next_congratulations = self._dates_in_year(today.year)
+        passed = next_congratulations < today64
+        if passed.any():
+            next_congratulations = np.where(passed, self._dates_in_year(today.year + 1), next_congratulations)
+
+        difference = (next_congratulations - today64).astype(np.int64)
+        selected = np.flatnonzero(difference <= days)
+        congratulations = next_congratulations[selected]
+
+        weekday = (congratulations.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+        congratulations = congratulations + np.select([weekday == 5, weekday == 6], [2, 1], 0)
+
+        order = np.lexsort((self.seqs[selected], congratulations))
+        dates = np.datetime_as_string(congratulations[order], unit='D')
+        names = self.names[selected[order]]
+        return [{"name": name, "congratulation_date": day.replace('-', '.')}
+                for name, day in zip(names.tolist(), dates.tolist())]
@@ -0,0 +1,144 @@
+"""One-shot subcommands: `organizer <command> ...` runs a single operation and exits.
+
+Changes are recorded in the journal like in the interactive menu, so a
+command does not rewrite the whole snapshot.
+"""
+import argparse
+import os
+import sys
+
+from organizer import handlers
+from organizer.entities import Note, Record
+from organizer.output import write_lines
+
+
+def contact_add(book, args):
+    record = Record.from_dict({"name": args.name, "phone": args.phone, "birthday": args.birthday,
+                               "email": args.email, "address": args.address})
+    book.add_contact(record)
+    return "Contact added."
+
+
+def contact_list(book, args):
+    write_lines(str(record) for record in book.iter_contacts(args.offset, args.limit))
+
+
+def contact_search(book, args):
+    if args.fuzzy is not None:
+        records = book.fuzzy_contacts(args.query, args.fuzzy)
+    else:
+        records = book.search_contacts(args.query)
+    write_lines(str(record) for record in records)
+
+
+def contact_delete(book, args):
+    record = book.find_contact(args.name)
+    if record is None:
+        raise KeyError(f"Contact {args.name} doesn't exist in your contact list.")
+    book.delete_contact(record.name.value)
+    return "Contact was deleted."
+
+
+def birthdays(book, args):
+    write_lines(f"{contact['congratulation_date']}\t{contact['name']}"
+                for contact in book.get_upcoming_birthdays(args.days))
+
+
+def note_add(book, args):
+    book.add_note(Note(args.title, args.text, list(args.tag)))
+    return "Note created."
+
+
+def note_list(book, args):
+    write_lines(str(note) for _, note in book.iter_notes(args.offset, args.limit))
+
+
+def note_search(book, args):
+    if args.tag:
+        titles = sorted(book.find_note_titles_by_tags(args.tag, match_all=args.all))
+        write_lines(str(book.notes[title]) for title in titles)
+    elif args.rank:
+        write_lines(str(note) for note in book.rank_notes(args.rank, args.limit))
+    else:
+        # find_notes_by_text returns the lines indented for the menu
+        write_lines(line.lstrip() for line in book.find_notes_by_text(args.text) or [])
+
+
+def note_delete(book, args):
+    book.delete_note(args.title)
+    return "Note was deleted."
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="organizer", description="Contacts and notes in the terminal. "
+                                                                   "Without a command the interactive menu starts.")
+    parser.add_argument("--backend", choices=tuple(handlers.BACKENDS),
+                        default=os.environ.get("ORGANIZER_BACKEND", "pickle"))
+    parser.add_argument("--profile", nargs="?", const=True, metavar="FILE",
+                        help="record time and memory per handler and Organizer method, "
+                             "written as JSON to FILE (default ~/.organizer/profile.json) at exit")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    contact = commands.add_parser("contact", help="add, list, search or delete contacts")
+    contact_commands = contact.add_subparsers(dest="action", metavar="action", required=True)
+    add = contact_commands.add_parser("add", help="add a contact")
+    add.add_argument("--name", required=True)
+    add.add_argument("--phone", help="10 digits")
+    add.add_argument("--birthday", help="DD.MM.YYYY")
+    add.add_argument("--email")
+    add.add_argument("--address")
+    add.set_defaults(run=contact_add)
+    listing = contact_commands.add_parser("list", help="list contacts")
+    listing.add_argument("--offset", type=int, default=0)
+    listing.add_argument("--limit", type=int)
+    listing.set_defaults(run=contact_list)
+    search = contact_commands.add_parser("search", help="contacts whose name or phone contains a text")
+    search.add_argument("query")
+    search.add_argument("--fuzzy", type=int, nargs="?", const=2, metavar="TYPOS",
+                        help="names at most TYPOS edits from query instead, closest first (default 2)")
+    search.set_defaults(run=contact_search)
+    delete = contact_commands.add_parser("delete", help="delete a contact")
+    delete.add_argument("name")
+    delete.set_defaults(run=contact_delete)
+
+    upcoming = commands.add_parser("birthdays", help="upcoming birthdays, one 'date<TAB>name' per line")
+    upcoming.add_argument("--days", type=int, default=7)
+    upcoming.set_defaults(run=birthdays)
+
+    notes = commands.add_parser("notes", help="add, list, search or delete notes")
+    note_commands = notes.add_subparsers(dest="action", metavar="action", required=True)
+    add = note_commands.add_parser("add", help="add a note")
+    add.add_argument("--title", required=True)
+    add.add_argument("--text", required=True)
+    add.add_argument("--tag", action="append", default=[], help="repeat for several tags")
+    add.set_defaults(run=note_add)
+    listing = note_commands.add_parser("list", help="list notes")
+    listing.add_argument("--offset", type=int, default=0)
+    listing.add_argument("--limit", type=int)
+    listing.set_defaults(run=note_list)
+    search = note_commands.add_parser("search", help="search notes by tag, text or best match")
+    query = search.add_mutually_exclusive_group(required=True)
+    query.add_argument("--tag", action="append", help="repeat for several tags")
+    query.add_argument("--text", help="substring of title or content")
+    query.add_argument("--rank", metavar="WORDS", help="best matches for these words")
+    search.add_argument("--all", action="store_true", help="with several --tag, notes carrying every tag")
+    search.add_argument("--limit", type=int, default=10, help="results for --rank (default 10)")
+    search.set_defaults(run=note_search)
+    delete = note_commands.add_parser("delete", help="delete a note")
+    delete.add_argument("title")
+    delete.set_defaults(run=note_delete)
+    return parser
+
+
+def run(args) -> int:
+    """Run a parsed subcommand; returns the exit status."""
+    book = handlers.load_data(backend=args.backend)
+    try:
+        message = args.run(book, args)
+    except (KeyError, ValueError) as e:
+        # KeyError wraps its message in quotes
+        print(f"organizer: {e.args[0] if e.args else e}", file=sys.stderr)
+        return 1
+    if message:
+        print(message)
+    return 0
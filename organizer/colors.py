@@ -0,0 +1,27 @@
+"""Fore and Style for colored output: colorama's on a terminal, empty strings otherwise.
+
+Setting NO_COLOR (https://no-color.org) turns colors off on a terminal too.
+
+colorama is only imported for interactive use, so one-shot commands start
+faster and piped output carries no escape codes.
+"""
+import os
+import sys
+
+
+class _Plain:
+    def __getattr__(self, name: str) -> str:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return ""
+
+
+# Stand-in for Fore and Style that renders without escape codes
+PLAIN = _Plain()
+
+if sys.stdout.isatty() and not os.environ.get("NO_COLOR"):
+    from colorama import Fore, Style, init
+
+    init(autoreset=True)
+else:
+    Fore = Style = PLAIN
@@ -1,77 +1,231 @@
 from organizer.validators import *
-from datetime import datetime as dt, timedelta as td
+from organizer.indexes import BKTree, BM25Index, TrigramIndex, tokenize
+from organizer.journal import COMPACT_EVERY, Journal, disk_size, journal_path
+from organizer.locking import file_lock
+from organizer.note_store import NoteBodies, write_bodies
+from organizer.colors import Fore, Style
+from organizer.output import write_lines
+from organizer import export, profiling
+from datetime import date, datetime as dt, timedelta as td
 from collections import UserDict
-from colorama import Fore, Style, init
+from bisect import bisect_left, insort
+from calendar import isleap
+from contextlib import suppress
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import os
 import pickle
+import zlib
 from typing import Optional
 
-init(autoreset=True)
-
 INDENT = 11
 
+# Offset of the first day of each month in a leap year, so every month/day
+# (29 February included) gets a fixed slot on a 366-day calendar.
+MONTH_STARTS = (0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335)
+
+# Threads reading shard files at load; the reads overlap, unpickling holds the GIL
+SHARD_READERS = 8
+
+# get_upcoming_birthdays switches to NumPy (when installed) once a window is
+# expected to hold this many birthdays
+BULK_BIRTHDAYS = 10_000
+
+
+def calendar_day(month: int, day: int) -> int:
+    return MONTH_STARTS[month - 1] + day - 1
+
+
+def birthday_in_year(birthday: date, year: int) -> date:
+    # 29 February is celebrated on 28 February in non-leap years
+    if birthday.month == 2 and birthday.day == 29 and not isleap(year):
+        return date(year, 2, 28)
+    return birthday.replace(year=year)
+
+
+def merge_sorted(entries: list, new: list):
+    """Merge new entries into the sorted list entries: one bisect per new entry, the rest is slice copies."""
+    new.sort()
+    merged = []
+    start = 0
+    for entry in new:
+        position = bisect_left(entries, entry, start)
+        merged.extend(entries[start:position])
+        merged.append(entry)
+        start = position
+    merged.extend(entries[start:])
+    entries[:] = merged
+
+
+def snapshot_signature(path: str) -> Optional[tuple]:
+    """Changes whenever the file is replaced (save() always writes a new file)."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Shard of a contact name or note title; crc32 because hash() differs between processes."""
+    return zlib.crc32(key.encode("utf-8")) % shards
+
+
+def load_shard(path: str) -> dict:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _entry_keys(entry: dict) -> list:
+    """(kind, key) of the contacts and notes a journal entry changes."""
+    op = entry["op"]
+    if op == "put_contact":
+        return [('contacts', entry["contact"]["name"])]
+    if op == "delete_contact":
+        return [('contacts', entry["name"])]
+    if op == "put_note":
+        return [('notes', entry["note"]["title"])]
+    if op == "rename_note":
+        return [('notes', entry["old"]), ('notes', entry["new"])]
+    return [('notes', entry["title"])]
+
+
+def same_entry(a, b) -> bool:
+    """Whether two records or notes (or None for a missing one) hold the same data."""
+    if a is None or b is None:
+        return a is b
+    return a.to_dict() == b.to_dict()
+
+
+# Slots rebuilt at runtime, never pickled
+TRANSIENT_SLOTS = ('_book', '_rendered')
+
+# Attribute names used by pickles written before the classes switched to __slots__
+LEGACY_ATTRIBUTES = {'value': '_value', '_Phone__value': '_value', '_Email__value': '_value'}
+
+
+@lru_cache(maxsize=None)
+def slot_names(cls) -> tuple:
+    return tuple(name for klass in reversed(cls.__mro__) for name in getattr(klass, '__slots__', ()))
+
+
+def restore_slots(obj, state):
+    # Pickles of slotted objects hold (dict_state, slot_state); old ones a plain __dict__ copy
+    if isinstance(state, tuple):
+        state = {**(state[0] or {}), **state[1]}
+    names = slot_names(type(obj))
+    setattr_ = object.__setattr__
+    get = state.get
+    for name in names:
+        setattr_(obj, name, get(name))
+    if len(state) > len(names) or not all(name in state for name in names):
+        for name in state.keys() - set(names):
+            setattr_(obj, LEGACY_ATTRIBUTES.get(name, name), state[name])
+
 
 class Field:
+    __slots__ = ('_value',)
+
     def __init__(self, value: str):
         self.value = value
 
+    @classmethod
+    def trusted(cls, value):
+        """Wrap a value that was already validated, e.g. by the batch validators."""
+        field = cls.__new__(cls)
+        field._value = value
+        return field
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value: str):
+        self._value = value
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in slot_names(type(self)) if name not in TRANSIENT_SLOTS}
+
+    def __setstate__(self, state):
+        restore_slots(self, state)
+
     def __str__(self):
         return str(self.value)
 
 
 class Name(Field):
+    __slots__ = ()
+
     def __init__(self, value: str): super().__init__(length_validator(value))
 
 
 class Phone(Field):
-    pattern = r'[0-9]{10}'
-
-    def __init__(self, value: str):
-        self.__value = value
-        super().__init__(self.__value)
+    __slots__ = ()
+    pattern = PHONE_PATTERN
 
     @property
-    def value(self): return self.__value
+    def value(self): return self._value
 
     @value.setter
     def value(self, value: str):
-        self.__value = phone_number_validator(self.pattern, value)
+        self._value = validate_phone(value)
 
 
 class Email(Field):
-    pattern = r'^[\w\.-]+@[\w\.-]+\.\w{2,}$'
-
-    def __init__(self, value: str):
-        self.__value = value
-        super().__init__(self.__value)
+    __slots__ = ()
+    pattern = EMAIL_PATTERN
 
     @property
     def value(self):
-        return self.__value
+        return self._value
 
     @value.setter
     def value(self, value: str):
-        self.__value = email_validator(self.pattern, value)
+        self._value = validate_email(value)
 
 
 class Birthday(Field):
+    __slots__ = ()
+
     def __init__(self, value: str):
-        try:
-            super().__init__(dt.strptime(value, "%d.%m.%Y").date())
-        except ValueError:
-            raise ValueError("Invalid date format. Use DD.MM.YYYY")
+        super().__init__(parse_date(value))
 
 
 class Address(Field):
+    __slots__ = ()
+
     def __init__(self, value: str): super().__init__(address_validator(value))
 
 
 class Record:
+    # _rendered caches __str__ until a setter changes the record; _version counts the changes
+    __slots__ = ('name', '_phone', '_birthday', '_address', '_email', '_book', '_rendered', '_version')
+
     def __init__(self, name: str):
         self.name = Name(name)
         self._phone = None
         self._birthday = None
         self._address = None
         self._email = None
+        self._book = None
+        self._rendered = None
+        self._version = 0
+
+    def _changed(self, field: str, old):
+        self._rendered = None
+        self._version = self.version + 1
+        # Let the owning Organizer refresh its indexes
+        if self._book is not None:
+            self._book._record_changed(self, field, old)
+
+    @property
+    def version(self) -> int:
+        # None in pickles written before versions were kept
+        return self._version or 0
 
     @property
     def phone(self):
@@ -79,10 +233,12 @@ class Record:
 
     @phone.setter
     def phone(self, number: str):
+        old = self._phone
         if number is None:
             self._phone = None
         else:
             self._phone = Phone(number)
+        self._changed('phone', old)
 
     @property
     def birthday(self):
@@ -90,10 +246,12 @@ class Record:
 
     @birthday.setter
     def birthday(self, birthday: str):
+        old = self._birthday
         if birthday is None:
             self._birthday = None
         else:
             self._birthday = Birthday(birthday)
+        self._changed('birthday', old)
 
     @property
     def address(self):
@@ -101,10 +259,12 @@ class Record:
 
     @address.setter
     def address(self, address: str):
+        old = self._address
         if address is None:
             self._address = None
         else:
             self._address = Address(address)
+        self._changed('address', old)
 
     @property
     def email(self):
@@ -112,44 +272,76 @@ class Record:
 
     @email.setter
     def email(self, email: str):
+        old = self._email
         if email is None:
             self._email = None
         else:
             self._email = Email(email)
+        self._changed('email', old)
 
     def add_phone(self, number: str):
-        self._phone = Phone(number)
+        self.phone = number
 
     def remove_phone(self):
-        self._phone = None
+        self.phone = None
 
     def edit_phone(self, new_value: str):
         # Now only takes one parameter - the new value
-        self._phone = Phone(new_value)
+        self.phone = new_value
 
     def add_birthday(self, birthday: str):
         self.birthday = birthday
 
+    def to_dict(self) -> dict:
+        bd = self.birthday.value if self.birthday else None
+        return {
+            "name": self.name.value,
+            "phone": self.phone.value if self.phone else None,
+            "birthday": f"{bd.day:02}.{bd.month:02}.{bd.year:04}" if bd else None,
+            "email": self.email.value if self.email else None,
+            "address": self.address.value if self.address else None,
+        }
+
+    def update(self, data: dict):
+        """Set phone, birthday, email and address from a to_dict() mapping (None clears a field)."""
+        for field in ('phone', 'birthday', 'email', 'address'):
+            setattr(self, field, data.get(field))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Record':
+        record = cls(data["name"])
+        record.update(data)
+        return record
+
+    @classmethod
+    def from_validated(cls, name: str, phone: str = None, birthday: date = None,
+                       email: str = None, address: str = None) -> 'Record':
+        """Build a record from values that passed the batch validators, without checking them again."""
+        record = cls.__new__(cls)
+        record.name = Name.trusted(name)
+        record._phone = Phone.trusted(phone) if phone else None
+        record._birthday = Birthday.trusted(birthday) if birthday else None
+        record._email = Email.trusted(email) if email else None
+        record._address = Address.trusted(address) if address else None
+        record._book = None
+        record._rendered = None
+        record._version = 0
+        return record
+
     def __getstate__(self):
-        return self.__dict__.copy()
+        return {name: getattr(self, name) for name in self.__slots__ if name not in TRANSIENT_SLOTS}
 
     def __setstate__(self, state):
-        self.__dict__.clear()
-        self.__dict__.update(state)
-
-        # Initialize any missing attributes to prevent attribute errors
-        if not hasattr(self, 'name'):
-            self.name = None
-        if not hasattr(self, '_phone'):
-            self._phone = None
-        if not hasattr(self, '_birthday'):
-            self._birthday = None
-        if not hasattr(self, '_address'):
-            self._address = None
-        if not hasattr(self, '_email'):
-            self._email = None
+        # Attributes missing from older pickles (and _book, _rendered) start out as None
+        restore_slots(self, state)
 
     def __str__(self):
+        if self._rendered is None:
+            self._rendered = self.render()
+        return self._rendered
+
+    def render(self) -> str:
+        """The one-line listing form, colored unless colors.py turned colors off."""
         info = [
             f"{Fore.LIGHTBLACK_EX}Name:{Style.RESET_ALL} {Style.BRIGHT}{self.name.value}{Style.RESET_ALL}"]
 
@@ -174,35 +366,139 @@ class Record:
 
 
 class Note(Field):
+    # _body is the (offset, length) of the content in the Organizer's notes data file
+    __slots__ = ('_title', '_tags', '_book', '_body', '_rendered', '_version')
+
     def __init__(self, title: str, value: str, tags: list = None):
         self._title = Name(title)
         self._tags = tags if tags is not None else []
+        self._book = None
+        self._body = None
+        self._value = None
+        self._rendered = None
+        self._version = 0
         super().__init__(length_validator(value))
 
+    def _changed(self, field: str, old):
+        version = self._version
+        self._version = self.version + 1
+        # Let the owning Organizer refresh its indexes; it refuses a rename to a taken
+        # title with KeyError, which then does not count as a change
+        if self._book is not None:
+            try:
+                self._book._note_changed(self, field, old)
+            except KeyError:
+                self._version = version
+                raise
+        self._rendered = None
+
+    @property
+    def version(self) -> int:
+        return self._version or 0
+
+    @property
+    def value(self):
+        if self._value is None and self._body is not None:
+            self._value = self.content()
+        return self._value
+
+    @value.setter
+    def value(self, value: str):
+        old = self.content()
+        self._value = value
+        self._body = None
+        self._changed('value', old)
+
+    def _detach(self):
+        """Take the note out of its book; the body is read first, the book's data file may go away."""
+        if self._value is None and self._body is not None:
+            self._value = self.content()
+            self._body = None
+        self._book = None
+
+    def content(self) -> str:
+        """The note text; a body not loaded yet is read from the data file without keeping it."""
+        if self._value is None and self._body is not None:
+            return self._book._note_bodies.read(*self._body)
+        return self._value
+
     @property
     def tags(self):
+        # Change tags through add_tag/change_tag/remove_tag so indexes stay current
         return self._tags
 
     @tags.setter
     def tags(self, value: str):
+        self.add_tag(value)
+
+    def add_tag(self, value: str):
         if value not in self.tags:
             tag = length_validator(value)
-            self.tags.append(tag)
+            old = list(self._tags)
+            self._tags.append(tag)
+            self._changed('tags', old)
         else:
             raise ValueError("The tag is already in the tag list of the note")
 
+    def change_tag(self, index: int, value: str):
+        tag = length_validator(value)
+        if tag in self._tags and self._tags.index(tag) != index:
+            raise ValueError("The tag is already in the tag list of the note")
+        old = list(self._tags)
+        self._tags[index] = tag
+        self._changed('tags', old)
+
+    def remove_tag(self, index: int) -> str:
+        old = list(self._tags)
+        tag = self._tags.pop(index)
+        self._changed('tags', old)
+        return tag
+
     @property
     def title(self):
         return self._title
 
     @title.setter
     def title(self, value: str):
+        old = self._title
         self._title = Name(value)
+        self._changed('title', old)
+
+    def set_tags(self, tags: list):
+        old = list(self._tags)
+        self._tags[:] = [length_validator(tag) for tag in tags]
+        self._changed('tags', old)
+
+    def to_dict(self) -> dict:
+        return {"title": self.title.value, "value": self.content(), "tags": list(self.tags)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Note':
+        return cls(data["title"], data["value"], list(data.get("tags", [])))
+
+    def search_text(self) -> str:
+        return f"{self.title.value} {self.content()}".lower()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        if self._body is not None:
+            del state['_value']  # stored in the notes data file
+        return state
 
     def __str__(self):
+        if self._rendered is not None:
+            return self._rendered
+        rendered = self.render()
+        if self._value is not None:
+            # A body still in the notes data file is not pinned in memory through the cache
+            self._rendered = rendered
+        return rendered
+
+    def render(self) -> str:
+        """Like Record.render."""
         info = [
             f"{Fore.LIGHTBLACK_EX}Title:{Style.RESET_ALL} {Style.BRIGHT}{self.title.value}{Style.RESET_ALL}",
-            f"{Fore.LIGHTBLACK_EX}Content:{Style.RESET_ALL} {Style.BRIGHT}{self.value}{Style.RESET_ALL}"
+            f"{Fore.LIGHTBLACK_EX}Content:{Style.RESET_ALL} {Style.BRIGHT}{self.content()}{Style.RESET_ALL}"
         ]
 
         if self.tags:
@@ -213,71 +509,546 @@ class Note(Field):
 
 
 class Organizer(UserDict):
+    # Lookup structures derived from contacts/notes; never pickled, rebuilt on load
+    _INDEXES = ('_name_index', '_contact_seq', '_next_seq', '_birthday_index', '_birthday_array',
+                '_tag_index', '_tag_grams', '_note_seq', '_next_note_seq', '_text_grams',
+                '_note_ranking', '_phone_index', '_phone_suffixes', '_name_tree')
+    # Per-process state, never pickled
+    _TRANSIENT = ('_journal', '_note_bodies', '_dirty', '_on_change', '_base_versions', '_disk_state',
+                  '_dirty_shards', '_unsaved', '_conflicts')
+
     def __init__(self):
         super().__init__()
         self.contacts = {}
         self.notes = {}
+        # name of the data file holding note bodies next to the snapshot, see save()
+        self._notes_file = None
+        self._note_bodies = None
+        # names of the shard files holding contacts and notes in the sharded layout, see save()
+        self._shards = None
+        self._dirty_shards = set()
+        self._journal = None
+        # True when there are changes the last snapshot does not have; _on_change is
+        # called on every change, see autosave.AutoSaver
+        self._dirty = False
+        self._on_change = None
+        # While the book is in step with a snapshot (see _synced): "contacts"/"notes" ->
+        # {key: version it had on disk} for every key changed since, and the
+        # snapshot's path and file signature. Used by save() to merge with other processes.
+        self._base_versions = None
+        self._disk_state = None
+        # Keys changed since they were last written anywhere (snapshot or journal),
+        # in the order of their first change; see save(delta=True)
+        self._unsaved = None
+        # Conflicts found while journaling a change, reported by the next save()
+        self._conflicts = []
+        self._build_indexes()
+
+    def _build_indexes(self, contact_seqs: dict = None, note_seqs: dict = None):
+        # contact_seqs/note_seqs keep the sequence numbers stored in shard files, see _load_shards
+        # casefolded name -> contact names, in insertion order
+        self._name_index = {}
+        # BK-tree over the keys of _name_index for fuzzy search, built on first use
+        self._name_tree = None
+        # contact name -> insertion sequence number, used as a stable tie-breaker
+        self._contact_seq = {}
+        self._next_seq = 0
+        # sorted (calendar_day, seq, name) entries for contacts with a birthday
+        self._birthday_index = []
+        # NumPy snapshot of _birthday_index, built on demand for bulk queries
+        self._birthday_array = None
+        # phone number -> contact names, in insertion order
+        self._phone_index = {}
+        # sorted (reversed phone number, seq, name) entries for "last digits" lookups
+        self._phone_suffixes = []
+        for name, record in self.contacts.items():
+            self._index_contact(record, None if contact_seqs is None else contact_seqs[name])
+            if record.birthday:
+                self._birthday_index.append(self._birthday_entry(name, record.birthday))
+            if record.phone:
+                self._phone_index.setdefault(record.phone.value.strip(), []).append(name)
+                self._phone_suffixes.append(self._phone_entry(name, record.phone))
+        self._birthday_index.sort()
+        self._phone_suffixes.sort()
+
+        # lowercased tag -> titles of the notes carrying it
+        self._tag_index = {}
+        # substring index over the distinct lowercased tags
+        self._tag_grams = TrigramIndex()
+        # note title -> insertion sequence number, keeps search results in notebook order
+        self._note_seq = {}
+        self._next_note_seq = 0
+        # Substring index over "title content" and BM25 statistics over title,
+        # content and tags; built on first use so loading never reads note bodies
+        self._text_grams = None
+        self._note_ranking = None
+        for title, note in self.notes.items():
+            self._index_note(note, None if note_seqs is None else note_seqs[title])
+
+    def _text_indexes(self):
+        if self._text_grams is None:
+            self._text_grams = TrigramIndex()
+            self._note_ranking = BM25Index()
+            for title, note in self.notes.items():
+                self._add_note_text(title, note.content(), note.tags)
+        return self._text_grams, self._note_ranking
+
+    def _add_note_text(self, title: str, content: str, tags: list):
+        if self._text_grams is not None:
+            self._text_grams.add(title, f"{title} {content}".lower())
+            self._note_ranking.add(title, tokenize(f"{title} {content} {' '.join(tags)}"))
+
+    def _remove_note_text(self, title: str, content: str, tags: list):
+        if self._text_grams is not None:
+            self._text_grams.remove(title, f"{title} {content}".lower())
+            self._note_ranking.remove(title, tokenize(f"{title} {content} {' '.join(tags)}"))
+
+    def _index_note(self, note: Note, seq: int = None):
+        title = note.title.value
+        note._book = self
+        if seq is None:
+            seq = self._next_note_seq
+        self._note_seq[title] = seq
+        self._next_note_seq = max(self._next_note_seq, seq + 1)
+        self._index_tags(title, note.tags)
+        if self._text_grams is not None:
+            self._add_note_text(title, note.content(), note.tags)
+
+    def _unindex_note(self, note: Note):
+        title = note.title.value
+        if self._text_grams is not None:
+            self._remove_note_text(title, note.content(), note.tags)
+        note._detach()
+        del self._note_seq[title]
+        self._unindex_tags(title, note.tags)
+
+    def _in_note_order(self, titles) -> list:
+        return sorted(titles, key=self._note_seq.__getitem__)
+
+    def _index_contact(self, record: Record, seq: int = None):
+        name = record.name.value
+        record._book = self
+        folded = name.casefold()
+        names = self._name_index.setdefault(folded, [])
+        if not names and self._name_tree is not None:
+            self._name_tree.add(folded)
+        names.append(name)
+        if seq is None:
+            seq = self._next_seq
+        self._contact_seq[name] = seq
+        self._next_seq = max(self._next_seq, seq + 1)
+
+    def _unindex_contact(self, record: Record):
+        name = record.name.value
+        record._book = None
+        folded = name.casefold()
+        names = self._name_index[folded]
+        names.remove(name)
+        if not names:
+            del self._name_index[folded]
+            if self._name_tree is not None:
+                self._name_tree.remove(folded)
+        del self._contact_seq[name]
+
+    def _birthday_entry(self, name: str, birthday: Birthday) -> tuple:
+        bd = birthday.value
+        return calendar_day(bd.month, bd.day), self._contact_seq[name], name
+
+    def _remove_birthday(self, name: str, birthday: Birthday):
+        entry = self._birthday_entry(name, birthday)
+        del self._birthday_index[bisect_left(self._birthday_index, entry)]
+        self._birthday_array = None
+
+    def _insert_birthday(self, name: str, birthday: Birthday):
+        insort(self._birthday_index, self._birthday_entry(name, birthday))
+        self._birthday_array = None
+
+    def _index_tags(self, title: str, tags: list):
+        for tag in {tag.lower() for tag in tags}:
+            titles = self._tag_index.get(tag)
+            if titles is None:
+                titles = self._tag_index[tag] = set()
+                self._tag_grams.add(tag, tag)
+            titles.add(title)
+
+    def _unindex_tags(self, title: str, tags: list):
+        for tag in {tag.lower() for tag in tags}:
+            titles = self._tag_index[tag]
+            titles.discard(title)
+            if not titles:
+                del self._tag_index[tag]
+                self._tag_grams.remove(tag, tag)
+
+    def _track(self, kind: str, key: str, base: Optional[int]):
+        # Called by every change to a contact or note: add_*, delete_*, the Record
+        # setters (add_phone/edit_phone/remove_phone included) and the Note mutations
+        if self._base_versions is not None:
+            self._base_versions[kind].setdefault(key, base)
+            if self._journal is None:
+                self._unsaved[kind][key] = None
+        if self._shards is not None:
+            self._dirty_shards.add(shard_of(key, len(self._shards)))
+
+    def _touch(self):
+        self._dirty = True
+        if self._on_change is not None:
+            self._on_change()
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def _log(self, entry: dict):
+        self._log_many((entry,))
+
+    def _log_many(self, entries):
+        self._touch()
+        if self._journal is not None:
+            path = self._journal.snapshot_path
+            with file_lock(path):
+                # Another process saved or journaled since our last write: take that in
+                # first, so this change never silently overwrites theirs
+                caught_up = (self._disk_state is not None and self._disk_state[0] == os.path.abspath(path)
+                             and self._changed_on_disk(path))
+                if caught_up:
+                    entries = self._catch_up(path, entries)
+                self._journal.extend(entries)
+                if caught_up:
+                    self._journal.size = disk_size(self._journal.path)
+                if self._base_versions is not None:
+                    # This change is on disk now; the next one is checked against it
+                    self._base_versions = {'contacts': {}, 'notes': {}}
+            # With a background saver attached (see autosave.AutoSaver), its next save
+            # folds the journal instead, off the thread making the change
+            if self._journal.entries >= COMPACT_EVERY and self._on_change is None:
+                with file_lock(path):
+                    # With changes from other processes to merge, leave it to an explicit
+                    # save, whose caller reports the conflicts
+                    if not self._changed_on_disk(path):
+                        self.save(path)
+
+    def _catch_up(self, path: str, entries) -> list:
+        """Merge in what other processes saved or journaled before appending entries.
+
+        Returns the entries to append instead: unchanged, or without the
+        contacts and notes that conflict with theirs. Those conflicts are
+        reported by the next save(), see _merge.
+        """
+        conflicts = self._merge(path)
+        self._synced(path)
+        if not conflicts:
+            return entries
+        self._conflicts.extend(conflicts)
+        clashed = {(kind, key) for kind, key, _ in conflicts}
+        keys = {}
+        for entry in entries:
+            for kind, key in _entry_keys(entry):
+                if (kind, key) not in clashed:
+                    keys[kind, key] = None
+        # The rest of the change, as it now stands in the merged book
+        return [self._current_entry(kind, key) for kind, key in keys]
+
+    def _current_entry(self, kind: str, key: str) -> dict:
+        """A journal entry that brings a contact or note on disk to its state here."""
+        if kind == 'contacts':
+            record = self.contacts.get(key)
+            if record is None:
+                return {"op": "delete_contact", "name": key}
+            return {"op": "put_contact", "contact": record.to_dict(), "version": record.version}
+        note = self.notes.get(key)
+        if note is None:
+            return {"op": "delete_note", "title": key}
+        return {"op": "put_note", "note": note.to_dict(), "version": note.version}
+
+    def apply_change(self, entry: dict):
+        """Apply one journal entry, see _log calls for the formats."""
+        op = entry["op"]
+        if op == "put_contact":
+            data = entry["contact"]
+            record = self.contacts.get(data["name"])
+            if record is None:
+                record = Record.from_dict(data)
+                self.add_contact(record)
+            else:
+                record.update(data)
+            record._version = entry.get("version", record._version)
+        elif op == "delete_contact":
+            if entry["name"] in self.contacts:
+                self.delete_contact(entry["name"])
+        elif op == "put_note":
+            data = entry["note"]
+            note = self.notes.get(data["title"])
+            if note is None:
+                note = Note.from_dict(data)
+                self.add_note(note)
+            else:
+                note.value = data["value"]
+                note.set_tags(data["tags"])
+            note._version = entry.get("version", note._version)
+        elif op == "rename_note":
+            if entry["old"] in self.notes and entry["new"] not in self.notes:
+                note = self.notes[entry["old"]]
+                note.title = entry["new"]
+                note._version = entry.get("version", note._version)
+        elif op == "delete_note":
+            if entry["title"] in self.notes:
+                self._remove_note(entry["title"])
+        else:
+            raise ValueError(f"Unknown journal operation {op!r}")
+
+    def _note_changed(self, note: Note, field: str, old):
+        title = note.title.value
+        if field == 'title':
+            old_title = old.value
+            if old_title == title:
+                return
+            if title in self.notes:
+                note._title = old
+                raise KeyError(f"The {title} is already in list of notes")
+            self._track('notes', old_title, note.version - 1)
+            self._track('notes', title, None)
+            # Re-key the note in place so the listing order is preserved
+            items = [(title if key == old_title else key, value) for key, value in self.notes.items()]
+            self.notes.clear()
+            self.notes.update(items)
+            self._note_seq[title] = self._note_seq.pop(old_title)
+            self._unindex_tags(old_title, note.tags)
+            self._index_tags(title, note.tags)
+            if self._text_grams is not None:
+                content = note.content()
+                self._remove_note_text(old_title, content, note.tags)
+                self._add_note_text(title, content, note.tags)
+            self._log({"op": "rename_note", "old": old_title, "new": title, "version": note.version})
+            return
+        elif field == 'value':
+            self._remove_note_text(title, old, note.tags)
+            self._add_note_text(title, note.value, note.tags)
+        elif field == 'tags':
+            self._unindex_tags(title, old)
+            self._index_tags(title, note.tags)
+            if self._note_ranking is not None:
+                content = note.content()
+                self._note_ranking.remove(title, tokenize(f"{title} {content} {' '.join(old)}"))
+                self._note_ranking.add(title, tokenize(f"{title} {content} {' '.join(note.tags)}"))
+        self._track('notes', title, note.version - 1)
+        self._log({"op": "put_note", "note": note.to_dict(), "version": note.version})
+
+    def _phone_entry(self, name: str, phone: Phone) -> tuple:
+        return phone.value.strip()[::-1], self._contact_seq[name], name
+
+    def _insert_phone(self, name: str, phone: Phone):
+        self._phone_index.setdefault(phone.value.strip(), []).append(name)
+        insort(self._phone_suffixes, self._phone_entry(name, phone))
+
+    def _remove_phone(self, name: str, phone: Phone):
+        number = phone.value.strip()
+        names = self._phone_index[number]
+        names.remove(name)
+        if not names:
+            del self._phone_index[number]
+        entry = self._phone_entry(name, phone)
+        del self._phone_suffixes[bisect_left(self._phone_suffixes, entry)]
+
+    def _record_changed(self, record: Record, field: str, old):
+        name = record.name.value
+        if field == 'birthday':
+            if old:
+                self._remove_birthday(name, old)
+            if record.birthday:
+                self._insert_birthday(name, record.birthday)
+        elif field == 'phone':
+            if old:
+                self._remove_phone(name, old)
+            if record.phone:
+                self._insert_phone(name, record.phone)
+        self._track('contacts', name, record.version - 1)
+        self._log({"op": "put_contact", "contact": record.to_dict(), "version": record.version})
 
     # Contact methods
     def add_contact(self, record: Record):
         if isinstance(record, Record):
             if record.name.value not in self.contacts:
                 self.contacts[record.name.value] = record
+                self._index_contact(record)
+                if record.birthday:
+                    self._insert_birthday(record.name.value, record.birthday)
+                if record.phone:
+                    self._insert_phone(record.name.value, record.phone)
+                self._track('contacts', record.name.value, None)
+                self._log({"op": "put_contact", "contact": record.to_dict(), "version": record.version})
             else:
                 raise KeyError(f"The {record.name.value} is already in contact list")
         else:
             raise ValueError(f"The {record} is not instance of Record")
 
+    def add_contacts(self, records) -> list:
+        """Add a batch of records at once; returns (record, reason) for those that were skipped.
+
+        The new entries of the sorted birthday and phone indexes are merged in
+        one pass per batch, and the journal is written with one fsync.
+        """
+        rejected = []
+        added = []
+        birthdays = []
+        phones = []
+        for record in records:
+            name = record.name.value
+            if name in self.contacts:
+                rejected.append((record, f"The {name} is already in contact list"))
+                continue
+            self.contacts[name] = record
+            self._index_contact(record)
+            if record.birthday:
+                birthdays.append(self._birthday_entry(name, record.birthday))
+            if record.phone:
+                self._phone_index.setdefault(record.phone.value.strip(), []).append(name)
+                phones.append(self._phone_entry(name, record.phone))
+            added.append(record)
+
+        merge_sorted(self._birthday_index, birthdays)
+        merge_sorted(self._phone_suffixes, phones)
+        if birthdays:
+            self._birthday_array = None
+        if added and (self._base_versions is not None or self._shards is not None):
+            for record in added:
+                self._track('contacts', record.name.value, None)
+        if added and self._journal is not None:
+            self._log_many([{"op": "put_contact", "contact": record.to_dict(), "version": record.version}
+                            for record in added])
+        elif added:
+            self._touch()
+        return rejected
+
     def find_contact(self, name: str) -> Optional[Record]:
-        for contact_name, record in self.contacts.items():
-            if contact_name.lower() == name.lower():
-                return record
+        names = self._name_index.get(name.casefold())
+        if names:
+            return self.contacts[names[0]]
+
+    def _name_tree_index(self) -> BKTree:
+        if self._name_tree is None:
+            self._name_tree = BKTree(self._name_index)
+        return self._name_tree
+
+    def _contacts_named(self, folded: str) -> list:
+        return [self.contacts[name] for name in self._name_index.get(folded, ())]
+
+    def fuzzy_contacts(self, name: str, max_distance: int = 2, limit: int = 10) -> list:
+        """Up to limit contacts whose name is at most max_distance typos from name, ignoring case; closest first."""
+        matches = self._name_tree_index().search(name.casefold(), max_distance, limit)
+        return [record for _, folded in matches for record in self._contacts_named(folded)][:limit]
+
+    def iter_contacts(self, offset: int = 0, limit: Optional[int] = None):
+        """Records in insertion order, starting at offset."""
+        stop = None if limit is None else offset + limit
+        return islice(self.contacts.values(), offset, stop)
+
+    def search_contacts(self, query: str, limit: Optional[int] = None) -> list:
+        """Up to limit contacts whose name or phone number contains query, in insertion order."""
+        query = query.lower()
+        return list(islice((record for name, record in self.contacts.items()
+                            if query in name.lower() or (record.phone and query in record.phone.value.lower())),
+                           limit))
+
+    def find_by_phone(self, number: str, suffix: bool = False) -> list:
+        """Contacts with exactly this phone number, or with suffix=True, whose number ends with it."""
+        number = number.strip()
+        if not suffix:
+            return [self.contacts[name] for name in self._phone_index.get(number, ())]
+        if not number:
+            return []
+
+        reversed_number = number[::-1]
+        upper = reversed_number[:-1] + chr(ord(reversed_number[-1]) + 1)
+        left = bisect_left(self._phone_suffixes, (reversed_number,))
+        right = bisect_left(self._phone_suffixes, (upper,))
+        found = sorted(self._phone_suffixes[left:right], key=itemgetter(1))
+        return [self.contacts[name] for _, _, name in found]
 
     def delete_contact(self, name: str) -> Optional[Record]:
         if name in self.contacts:
-            return self.contacts.pop(name)
+            record = self.contacts.pop(name)
+            if record.birthday:
+                self._remove_birthday(name, record.birthday)
+            if record.phone:
+                self._remove_phone(name, record.phone)
+            self._unindex_contact(record)
+            self._track('contacts', name, record.version)
+            self._log({"op": "delete_contact", "name": name})
+            return record
         else:
             raise KeyError(f'{name} is absent in contact list')
 
-    def get_upcoming_birthdays(self, days: int = 7) -> list:
-        try:
-            birthday_people = []
-            current_day = dt.today().date()
-            for user, record in self.contacts.items():
-                if record.birthday:
-                    user_birthday = record.birthday.value
-                    next_congratulations = user_birthday.replace(
-                        year=current_day.year)
-                    difference = (next_congratulations - current_day).days
-                    if difference < 0:
-                        next_congratulations = user_birthday.replace(
-                            year=current_day.year + 1)
-                        difference = (next_congratulations - current_day).days
-
-                    next_congratulations_weekday = next_congratulations.weekday()
-
-                    if 0 <= difference <= days:
-                        if next_congratulations_weekday == 6:
-                            next_congratulations += td(days=1)
-                        elif next_congratulations_weekday == 5:
-                            next_congratulations += td(days=2)
-                        congratulations_date = dt.strftime(
-                            next_congratulations, "%Y.%m.%d")
-                        birthday_people.append(
-                            {"name": user, "congratulation_date": congratulations_date})
-
-            birthday_people.sort(key=lambda x: x["congratulation_date"])
-
-            return birthday_people
-        except Exception as e:
-            print('Function argument must be user list.')
-            return []
+    def _birthday_count(self) -> int:
+        return len(self._birthday_index)
+
+    def _birthday_entries(self) -> list:
+        return self._birthday_index
+
+    def _birthdays_between(self, low: int, high: int):
+        """(seq, name, birthday) for calendar days low..high, in calendar order."""
+        left = bisect_left(self._birthday_index, (low,))
+        right = bisect_left(self._birthday_index, (high + 1,))
+        for _, seq, name in self._birthday_index[left:right]:
+            yield seq, name, self.contacts[name].birthday.value
+
+    def get_upcoming_birthdays(self, days: int = 7, engine: str = "auto") -> list:
+        """engine: "python" (calendar index), "numpy" (vectorized) or "auto"."""
+        current_day = dt.today().date()
+        if engine == "auto":
+            engine = "python"
+            if self._birthday_count() * (min(days, 365) + 1) >= BULK_BIRTHDAYS * 366:
+                from organizer import birthday_engine
+                if birthday_engine.np is not None:
+                    engine = "numpy"
+        if engine == "numpy":
+            from organizer.birthday_engine import BirthdayArray
+            if self._birthday_array is None:
+                self._birthday_array = BirthdayArray(self._birthday_entries())
+            return self._birthday_array.upcoming(current_day, days)
+
+        birthday_people = []
+        # A year is the longest useful window; every contact appears at most once
+        last_day = current_day + td(days=min(days, 366))
+        seen = set()
+
+        # Walk the window one calendar year at a time and slice the sorted index
+        segment_start = current_day
+        while segment_start <= last_day:
+            segment_end = min(last_day, date(segment_start.year, 12, 31))
+            low = calendar_day(segment_start.month, segment_start.day)
+            high = calendar_day(segment_end.month, segment_end.day)
+            if segment_end.month == 2 and segment_end.day == 28 and not isleap(segment_end.year):
+                high += 1  # 29 February birthdays fall on the 28th this year
+
+            for seq, user, birthday in self._birthdays_between(low, high):
+                if user in seen:
+                    continue
+                seen.add(user)
+                next_congratulations = birthday_in_year(birthday, segment_start.year)
+
+                next_congratulations_weekday = next_congratulations.weekday()
+                if next_congratulations_weekday == 6:
+                    next_congratulations += td(days=1)
+                elif next_congratulations_weekday == 5:
+                    next_congratulations += td(days=2)
+                congratulations_date = next_congratulations.strftime("%Y.%m.%d")
+                birthday_people.append((congratulations_date, seq, user))
+
+            segment_start = segment_end + td(days=1)
+
+        birthday_people.sort()
+
+        return [{"name": user, "congratulation_date": congratulations_date}
+                for congratulations_date, _, user in birthday_people]
 
     # Note methods
     def add_note(self, note: Note):
         if isinstance(note, Note):
             if note.title.value not in self.notes:
                 self.notes[note.title.value] = note
+                self._index_note(note)
+                self._track('notes', note.title.value, None)
+                self._log({"op": "put_note", "note": note.to_dict(), "version": note.version})
             else:
                 raise KeyError(f"The {note.title.value} is already in list of notes")
         else:
@@ -287,61 +1058,391 @@ class Organizer(UserDict):
         if title in self.notes:
             return self.notes.get(title)
 
-    def show_notes(self):
+    def iter_notes(self, offset: int = 0, limit: Optional[int] = None):
+        """(position, note) pairs in insertion order, starting at offset."""
+        stop = None if limit is None else offset + limit
+        return islice(enumerate(self.notes.values()), offset, stop)
+
+    def show_notes(self, offset: int = 0, limit: Optional[int] = None):
         if not self.notes:
             print(f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}No notes available.{Style.RESET_ALL}")
             return self
 
-        for i, note in enumerate(self.notes.values()):
-            print(f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}[{i}]{Style.RESET_ALL} {str(note)}")
-
+        write_lines(f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}[{i}]{Style.RESET_ALL} {str(note)}"
+                    for i, note in self.iter_notes(offset, limit))
         return self
 
-    def delete_note(self, title: str) -> str:
-        try:
-            if title not in self.notes:
-                return f"{' ' * INDENT}Note was not found"
-
-            confirmation = input(f"{' ' * INDENT}Do you want to delete Note '{title}'? (Y/N): ")
-            if confirmation.lower() != 'y':
-                return f"{' ' * INDENT}Deletion cancelled."
-
-            self.notes.pop(title)
-            return f"{' ' * INDENT}Note was deleted"
-        except Exception as e:
-            return f"Error: {str(e)}"
+    def delete_note(self, title: str) -> Note:
+        if title not in self.notes:
+            raise KeyError(f"Note {title} was not found.")
+        return self._remove_note(title)
+
+    def _remove_note(self, title: str) -> Note:
+        note = self.notes.pop(title)
+        self._unindex_note(note)
+        self._track('notes', title, note.version)
+        self._log({"op": "delete_note", "title": title})
+        return note
+
+    def notes_by_text(self, text: str) -> list:
+        """Notes whose title or content contains text (case-insensitive), in notebook order."""
+        query = text.lower()
+        text_grams, _ = self._text_indexes()
+        candidates = text_grams.candidates(query)
+        if candidates is None:
+            candidates = self.notes
+        titles = [title for title in candidates if query in self.notes[title].search_text()]
+        return [self.notes[title] for title in self._in_note_order(titles)]
 
     def find_notes_by_text(self, text: str):
-        found_notes = []
-        for _, note in self.notes.items():
-            search_phrase = f"{note.title.value} {note.value}".lower()
-            if text.lower() in search_phrase:
-                found_notes.append(f"{' ' * INDENT}{str(note)}")
+        found_notes = [f"{' ' * INDENT}{str(note)}" for note in self.notes_by_text(text)]
         if found_notes:
             return found_notes
 
+    def rank_notes(self, text: str, limit: int = 10) -> list:
+        """Up to limit notes best matching the words of text, ranked by BM25."""
+        _, ranking = self._text_indexes()
+        return [self.notes[title] for title, _ in ranking.top(tokenize(text), limit)]
+
+    def _titles_by_tag(self, text: str) -> set:
+        query = text.lower()
+        tags = self._tag_grams.candidates(query)
+        if tags is None:
+            tags = self._tag_index
+        titles = set()
+        for tag in tags:
+            if query in tag:
+                titles |= self._tag_index[tag]
+        return titles
+
+    def find_note_titles_by_tags(self, tags: list, match_all: bool = False) -> set:
+        """Titles of notes with a tag containing any (or, with match_all, every) of the given strings."""
+        found = None
+        for text in tags:
+            titles = self._titles_by_tag(text)
+            if found is None:
+                found = titles
+            elif match_all:
+                found &= titles
+            else:
+                found |= titles
+        return found or set()
+
+    def notes_by_tag(self, text: str) -> list:
+        """Notes with a tag containing text, in notebook order."""
+        return [self.notes[title] for title in self._in_note_order(self._titles_by_tag(text))]
+
     def find_notes_by_tags(self, text: str):
-        found_notes = []
-        for _, note in self.notes.items():
-            if any(text.lower() in tag.lower() for tag in note.tags):
-                found_notes.append(f"{' ' * INDENT}{str(note)}")
+        found_notes = [f"{' ' * INDENT}{str(note)}" for note in self.notes_by_tag(text)]
         if found_notes:
             return found_notes
        
-    def save(self, filename="organizer.pkl"):
-        with open(filename, "wb") as f:
+    def iter_export(self, format: str = "jsonl", notes: bool = True):
+        """Yield the book as newline-terminated text in one of export.FORMATS, entry by entry.
+
+        Contacts come first, then notes; vCard exports contacts only.
+        """
+        if format not in export.FORMATS:
+            raise ValueError(f"Unknown export format {format!r}, choose from {', '.join(export.FORMATS)}")
+        contacts = (record.to_dict() for record in self.contacts.values())
+        note_dicts = (note.to_dict() for note in self.notes.values()) if notes else ()
+        return export.SERIALIZERS[format](contacts, note_dicts)
+
+    def save(self, filename="organizer.pkl", split_notes: Optional[bool] = None,
+             shards: Optional[int] = None, delta: bool = False) -> list:
+        """Pickle the book to filename; returns the conflicts found on the way, see _merge.
+
+        With split_notes the note bodies go to a separate data file next to it,
+        so load() reads only titles, tags and body offsets. With shards, contacts
+        and notes are spread by name/title over that many shard files instead
+        (bodies included) and only the shards changed since the last save are
+        rewritten; filename then holds the rest of the book and the shard names.
+        shards=0 goes back to a single file. By default the layout the book was
+        loaded with is kept.
+
+        If another process saved or journaled changes since this book was
+        loaded, they are merged in first. The file lock is held only while
+        the snapshot is merged and written.
+
+        With delta, only the contacts and notes changed since the last save are
+        written, appended to the journal (which a book loaded with journal=True
+        has done on every change already), so the cost follows the size of the
+        change. The full snapshot is still written when there is none yet to
+        add to, when other processes' changes have to be merged, or once the
+        journal reaches COMPACT_EVERY entries.
+        """
+        with file_lock(filename):
+            # Conflicts found when journaling changes (see _catch_up) are reported here
+            conflicts, self._conflicts = self._conflicts, []
+            if delta and self._save_delta(filename, split_notes, shards):
+                return conflicts
+            synced = self._disk_state is None or self._disk_state[0] == os.path.abspath(filename)
+            merged = synced and self._changed_on_disk(filename)
+            if merged:
+                conflicts += self._merge(filename)
+            self._write(filename, split_notes, shards)
+
+            # The snapshot now contains everything the journal recorded
+            if self._journal is not None and os.path.abspath(filename) == os.path.abspath(self._journal.snapshot_path):
+                self._journal.truncate()
+            elif merged:
+                Journal(filename).truncate()
+            if synced:
+                self._synced(filename)
+        return conflicts
+
+    def _write(self, filename: str, split_notes: Optional[bool], shards: Optional[int]):
+        if shards is None:
+            shards = len(self._shards) if self._shards is not None else 0
+        if split_notes is None:
+            split_notes = self._notes_file is not None
+        old_bodies = self._note_bodies
+        old_shards = self._shards or ()
+        directory, base = os.path.split(filename)
+        stem = os.path.splitext(base)[0]
+
+        if shards:
+            self._write_shards(directory, stem, shards)
+            self._notes_file = None
+            self._note_bodies = None
+        elif split_notes:
+            self._shards = None
+            # A new data file per save: the old snapshot stays valid until the rename below
+            notes_file = f"{stem}.{os.urandom(4).hex()}.notes"
+            refs = write_bodies(os.path.join(directory, notes_file),
+                                (note.content() for note in self.notes.values()))
+            self._note_bodies = NoteBodies(os.path.join(directory, notes_file))
+            for note, ref in zip(self.notes.values(), refs):
+                note._body = ref
+            self._notes_file = notes_file
+        else:
+            self._shards = None
+            for note in self.notes.values():
+                note._value = note.content()  # pickled inline from now on
+                note._body = None
+            self._notes_file = None
+            self._note_bodies = None
+
+        # Write aside and rename so a crash never leaves a half-written snapshot
+        temp_name = f"{filename}.tmp"
+        with open(temp_name, "wb") as f:
             pickle.dump(self, f)
+        os.replace(temp_name, filename)
+        self._dirty = False
+        profiling.gauge("snapshot_bytes", os.path.getsize(filename))
+
+        if old_bodies is not None:
+            self._drop_bodies(old_bodies, filename)
+        for name in set(old_shards) - set(self._shards or ()):
+            # Shards of another snapshot (the book was saved under a new name) stay
+            if name.startswith(f"{stem}.shard"):
+                with suppress(FileNotFoundError):
+                    os.remove(os.path.join(directory, name))
+
+    def _write_shards(self, directory: str, stem: str, count: int):
+        """Write the shards changed since the last save, each to a new file named in self._shards."""
+        if self._shards is None or len(self._shards) != count or \
+                not all(name.startswith(f"{stem}.shard") and os.path.exists(os.path.join(directory, name))
+                        for name in self._shards):
+            # New layout, or the shards belong to another snapshot: write them all
+            files, rewrite = [None] * count, set(range(count))
+        else:
+            files, rewrite = list(self._shards), self._dirty_shards
+        if rewrite:
+            parts = {shard: ([], []) for shard in rewrite}
+            # One crc32 per key to find the members (shard_of inlined, it runs for
+            # every key); only the changed shards are pickled
+            crc32 = zlib.crc32
+            for record_name, record in self.contacts.items():
+                part = parts.get(crc32(record_name.encode("utf-8")) % count)
+                if part is not None:
+                    part[0].append((self._contact_seq[record_name], record))
+            for title, note in self.notes.items():
+                part = parts.get(crc32(title.encode("utf-8")) % count)
+                if part is not None:
+                    if note._body is not None:
+                        note._value = note.content()  # shards keep the bodies inline
+                        note._body = None
+                    part[1].append((self._note_seq[title], note))
+            for shard, (contacts, notes) in parts.items():
+                files[shard] = f"{stem}.shard{shard:03}.{os.urandom(4).hex()}.pkl"
+                with open(os.path.join(directory, files[shard]), "wb") as f:
+                    pickle.dump({"contacts": contacts, "notes": notes}, f)
+        self._shards = files
+        self._dirty_shards = set()
+
+    def _load_shards(self, directory: str):
+        """Read the shard files in parallel and fill contacts and notes in their stored order."""
+        with ThreadPoolExecutor(SHARD_READERS) as pool:
+            parts = list(pool.map(load_shard, (os.path.join(directory, name) for name in self._shards)))
+        # Each shard is in sequence order already; merging keeps the book's insertion order
+        by_seq = itemgetter(0)
+        contacts = list(heapq.merge(*(part["contacts"] for part in parts), key=by_seq))
+        notes = list(heapq.merge(*(part["notes"] for part in parts), key=by_seq))
+        self.contacts = {record.name.value: record for _, record in contacts}
+        self.notes = {note.title.value: note for _, note in notes}
+        self._build_indexes({record.name.value: seq for seq, record in contacts},
+                            {note.title.value: seq for seq, note in notes})
+
+    @staticmethod
+    def _drop_bodies(bodies: NoteBodies, filename: str):
+        bodies.close()
+        # Drop the previous data file unless another snapshot may still point to it
+        stem = os.path.splitext(filename)[0]
+        if os.path.dirname(bodies.path) == os.path.dirname(filename) and bodies.path.startswith(f"{stem}."):
+            # Another process may have removed it already when it saved
+            with suppress(FileNotFoundError):
+                os.remove(bodies.path)
+
+    def _synced(self, filename: str):
+        """Mark the book as matching the snapshot in filename."""
+        self._base_versions = {'contacts': {}, 'notes': {}}
+        self._unsaved = {'contacts': {}, 'notes': {}}
+        self._disk_state = (os.path.abspath(filename), snapshot_signature(filename))
+
+    def _delta_entries(self) -> list:
+        """Journal entries for the unsaved keys: the deletions, then each contact and note as it is now."""
+        entries = [{"op": "delete_contact", "name": name}
+                   for name in self._unsaved['contacts'] if name not in self.contacts]
+        entries += [{"op": "delete_note", "title": title}
+                    for title in self._unsaved['notes'] if title not in self.notes]
+        # In insertion order, so new entries come back in the same order on replay
+        names = sorted((name for name in self._unsaved['contacts'] if name in self.contacts),
+                       key=self._contact_seq.__getitem__)
+        entries += [{"op": "put_contact", "contact": self.contacts[name].to_dict(),
+                     "version": self.contacts[name].version} for name in names]
+        titles = self._in_note_order(title for title in self._unsaved['notes'] if title in self.notes)
+        entries += [{"op": "put_note", "note": self.notes[title].to_dict(),
+                     "version": self.notes[title].version} for title in titles]
+        return entries
+
+    def _save_delta(self, filename: str, split_notes: Optional[bool], shards: Optional[int]) -> bool:
+        """Append the unsaved changes to the journal; False when a full save is needed instead.
+
+        Called with the file lock held.
+        """
+        path = os.path.abspath(filename)
+        if self._disk_state is None or self._disk_state[0] != path or self._changed_on_disk(filename):
+            # Nothing to add a delta to, or other processes' changes to merge
+            return False
+        if shards is not None and shards != len(self._shards or ()):
+            # A different layout was asked for; split_notes only applies to a book
+            # that is not sharded, the shards hold the note bodies otherwise
+            return False
+        if not self._shards and split_notes is not None and split_notes != (self._notes_file is not None):
+            return False
+        if self._journal is None:
+            # The journal is empty (or _changed_on_disk would have said so); like a book
+            # loaded with journal=True, log later changes as they are made
+            self._journal = Journal(filename)
+        elif os.path.abspath(self._journal.snapshot_path) != path:
+            return False
+        unsaved = len(self._unsaved['contacts']) + len(self._unsaved['notes'])
+        if self._journal.entries + unsaved >= COMPACT_EVERY:
+            return False
+        if unsaved:
+            self._journal.extend(self._delta_entries())
+            self._unsaved = {'contacts': {}, 'notes': {}}
+            self._base_versions = {'contacts': {}, 'notes': {}}
+        self._dirty = False
+        return True
+
+    def _changed_on_disk(self, filename: str) -> bool:
+        if self._disk_state is None:
+            return False
+        if self._disk_state[1] != snapshot_signature(filename):
+            return True
+        if self._journal is not None and os.path.abspath(self._journal.snapshot_path) == os.path.abspath(filename):
+            return self._journal.changed_elsewhere()
+        return disk_size(journal_path(filename)) != 0
+
+    def _merge(self, filename: str) -> list:
+        """Take the book as saved and journaled on disk and apply this session's changes to it.
+
+        A contact or note changed here is a conflict when the disk version moved
+        away from the version this session started from and differs from ours.
+        The disk version is kept then, and (kind, key, our to_dict() or None if
+        we deleted it) is returned for each conflict.
+        """
+        disk = type(self).load(filename)
+        Journal(filename).replay(disk)
+        conflicts = []
+        for kind in ('contacts', 'notes'):
+            ours, theirs = getattr(self, kind), getattr(disk, kind)
+            for key, base in self._base_versions[kind].items():
+                mine, other = ours.get(key), theirs.get(key)
+                if (other.version if other is not None else None) != base and not same_entry(mine, other):
+                    conflicts.append((kind, key, mine.to_dict() if mine is not None else None))
+                    # Replaced by theirs, changes to it go nowhere
+                    if kind == 'notes' and mine is not None:
+                        mine._detach()
+                    elif mine is not None:
+                        mine._book = None
+                elif mine is None:
+                    theirs.pop(key, None)
+                else:
+                    if kind == 'notes' and mine._value is None:
+                        mine._value = mine.content()  # our data file is replaced below
+                        mine._body = None
+                    theirs[key] = mine
+
+        if self._note_bodies is not None:
+            if disk._note_bodies is not None and disk._note_bodies.path == self._note_bodies.path:
+                # The snapshot on disk still uses it, unless save() writes a new one after this
+                self._note_bodies.close()
+            else:
+                self._drop_bodies(self._note_bodies, filename)
+        self.contacts, self.notes = disk.contacts, disk.notes
+        self._notes_file, self._note_bodies = disk._notes_file, disk._note_bodies
+        self._build_indexes()
+        # Sequence numbers were given out anew, so every shard has to be written
+        self._shards = disk._shards
+        self._dirty_shards = set(range(len(self._shards))) if self._shards is not None else set()
+        return conflicts
 
     @classmethod
-    def load(cls, filename="organizer.pkl"):
-        try:
-            with open(filename, "rb") as f:
-                return pickle.load(f)
-        except FileNotFoundError:
-            return cls()
+    def load(cls, filename="organizer.pkl", journal: bool = False):
+        with file_lock(filename):
+            try:
+                with open(filename, "rb") as f:
+                    book = pickle.load(f)
+            except FileNotFoundError:
+                book = cls()
+
+            if book._notes_file is not None:
+                book._note_bodies = NoteBodies(os.path.join(os.path.dirname(filename), book._notes_file))
+            if book._shards is not None:
+                book._load_shards(os.path.dirname(filename))
+
+            if journal:
+                # Replay changes made after the snapshot, then keep logging new ones
+                log = Journal(filename)
+                log.replay(book)
+                book._journal = log
+                book._dirty = False  # the replayed changes are on disk already
+            book._synced(filename)
+        return book
 
     def __getstate__(self):
-        return self.__dict__
+        state = {key: value for key, value in self.__dict__.items()
+                 if key not in self._INDEXES and key not in self._TRANSIENT}
+        if self._shards is not None:
+            # In the shard files
+            state['contacts'] = {}
+            state['notes'] = {}
+        return state
 
     def __setstate__(self, state):
         self.__dict__.update(state)
+        self.__dict__.setdefault('_notes_file', None)
+        self.__dict__.setdefault('_shards', None)
+        self._dirty_shards = set()
+        self._note_bodies = None
+        self._journal = None
+        self._dirty = False
+        self._on_change = None
+        self._base_versions = None
+        self._disk_state = None
+        self._unsaved = None
+        self._conflicts = []
+        self._build_indexes()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""organizer-export: write contacts and notes as JSON Lines, CSV or vCard.
+
+The serializers take the to_dict() form of records and notes one at a time,
+so an export never builds a second copy of the book in memory.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+
+from organizer.journal import Journal
+
+FORMATS = ('jsonl', 'csv', 'vcard')
+
+CSV_COLUMNS = ('type', 'name', 'phone', 'birthday', 'email', 'address', 'title', 'value', 'tags')
+
+# vCard lines longer than this many characters are folded
+VCARD_LINE = 75
+
+
+def jsonl_entries(contacts, notes):
+    for contact in contacts:
+        yield json.dumps({"type": "contact", **contact}, ensure_ascii=False) + "\n"
+    for note in notes:
+        yield json.dumps({"type": "note", **note}, ensure_ascii=False) + "\n"
+
+
+def csv_entries(contacts, notes):
+    """One table for both kinds of entries; columns that do not apply are left empty."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS)
+
+    def row(data: dict) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(data)
+        return buffer.getvalue()
+
+    yield row({column: column for column in CSV_COLUMNS})
+    for contact in contacts:
+        yield row({"type": "contact", **contact})
+    for note in notes:
+        yield row({"type": "note", **note, "tags": ", ".join(note["tags"])})
+
+
+def _vcard_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace(",", "\\,").replace(";", "\\;")
+
+
+def _vcard_line(line: str) -> str:
+    parts = [line[i:i + VCARD_LINE] for i in range(0, len(line), VCARD_LINE)] or [""]
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def vcard(contact: dict) -> str:
+    name = _vcard_escape(contact["name"])
+    lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{name}", f"N:;{name};;;"]
+    if contact["phone"]:
+        lines.append(f"TEL;TYPE=CELL:{contact['phone'].strip()}")
+    if contact["birthday"]:
+        day, month, year = contact["birthday"].split(".")
+        lines.append(f"BDAY:{year}-{month}-{day}")
+    if contact["email"]:
+        lines.append(f"EMAIL:{_vcard_escape(contact['email'])}")
+    if contact["address"]:
+        lines.append(f"ADR:;;{_vcard_escape(contact['address'])};;;;")
+    lines.append("END:VCARD")
+    return "".join(_vcard_line(line) for line in lines)
+
+
+def vcard_entries(contacts, notes=()):
+    # vCard has no place for notes
+    for contact in contacts:
+        yield vcard(contact)
+
+
+SERIALIZERS = {'jsonl': jsonl_entries, 'csv': csv_entries, 'vcard': vcard_entries}
+
+
+def open_output(path: str = None, compress: bool = False):
+    """Text stream for path (stdout if None); gzip-compressed when asked or for *.gz names."""
+    if path is None:
+        if compress:
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb"),
+                                    encoding="utf-8", newline="")
+        return sys.stdout
+    if compress or path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def main(argv=None):
+    import argparse
+    from organizer import handlers
+    from organizer.output import discard_stdout, write_lines
+
+    parser = argparse.ArgumentParser(prog="organizer-export", description="Export contacts and notes.")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("-o", "--output", help="file to write (default: stdout; *.gz is compressed)")
+    parser.add_argument("-z", "--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("--no-notes", action="store_true", help="export contacts only")
+    parser.add_argument("--backend", choices=tuple(handlers.BACKENDS),
+                        default=os.environ.get("ORGANIZER_BACKEND", "pickle"))
+    args = parser.parse_args(argv)
+
+    book = handlers.load_data(journal=False, backend=args.backend)
+    # Replay without attaching the journal: exporting must not compact or rewrite the book
+    if args.backend == "pickle":
+        Journal(handlers.get_data_path()).replay(book)
+
+    stream = open_output(args.output, args.gzip)
+    try:
+        write_lines(book.iter_export(args.format, notes=not args.no_notes), stream, end="")
+        if stream is not sys.stdout:
+            stream.close()
+    except BrokenPipeError:
+        # gzip output to a pipe that was closed early
+        discard_stdout()
+
+
+if __name__ == "__main__":
+    main()
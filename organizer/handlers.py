@@ -1,14 +1,20 @@
+import json
 import os
-from curses.ascii import isdigit
-from colorama import Fore, Style
+import sys
+from organizer.colors import Fore, Style
 from organizer.entities import Organizer, Record, Note
+from organizer.output import write_lines
+from organizer.profiling import profiled
 from organizer.validators import *
 import pickle
 
 INDENT = 11
+# Entries per page when listing to a terminal
+PAGE_SIZE = 20
 
 
 def input_error(func):
+    @profiled(f"handlers.{func.__name__}")
     def inner(*args, **kwargs):
         try:
             return func(*args, **kwargs)
@@ -155,16 +161,33 @@ def change_contact(book: Organizer) -> str:
     return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Contact changed.{Style.RESET_ALL}"
 
 
+def page_through(show, total: int, page_size: int = PAGE_SIZE, offset: int = 0):
+    """Call show(offset, limit) one page at a time, asking before each next page.
+
+    When stdout is not a terminal everything from offset on is shown in one go.
+    """
+    if not sys.stdout.isatty():
+        show(offset, None)
+        return
+
+    while offset < total:
+        show(offset, page_size)
+        offset += page_size
+        if offset >= total:
+            break
+        if safe_input(f"Shown {offset} of {total}. Enter for next page", allow_empty=True) is None:
+            break
+
+
 @input_error
-def show_all(book: Organizer):
+def show_all(book: Organizer, page_size: int = PAGE_SIZE, offset: int = 0):
     if not book.contacts:
         return ' ' * INDENT + f'{Fore.LIGHTBLACK_EX}No contacts saved.{Style.RESET_ALL}'
 
-    result = []
-    for _, record in book.contacts.items():
-        result.append(' ' * INDENT + str(record))
+    def show(offset, limit):
+        write_lines(' ' * INDENT + str(record) for record in book.iter_contacts(offset, limit))
 
-    return "\n".join(result)
+    page_through(show, len(book.contacts), page_size, offset)
 
 
 @input_error
@@ -189,14 +212,60 @@ def get_data_path(filename="organizer.pkl"):
     return os.path.join(data_dir, filename)
 
 
-def save_data(book: Organizer, filename="organizer.pkl"):
-    full_path = get_data_path(filename)
-    book.save(full_path)
+# Storage backends and their default file names
+BACKENDS = {"pickle": "organizer.pkl", "sqlite": "organizer.db"}
 
 
-def load_data(filename="organizer.pkl"):
-    full_path = get_data_path(filename)
-    return Organizer.load(full_path)
+@profiled("handlers.save_data")
+def save_data(book: Organizer, filename=None, backend=None) -> list:
+    """Save book; with a backend other than the book's own, copy it into that storage instead.
+
+    Returns the conflicts with changes saved by other sessions, see format_conflicts.
+    """
+    from organizer.sqlite_store import SqliteOrganizer
+
+    current = "sqlite" if isinstance(book, SqliteOrganizer) else "pickle"
+    backend = backend or current
+    full_path = get_data_path(filename or BACKENDS[backend])
+
+    if backend == current == "pickle":
+        # Only the changes are written while the journal is short. When the snapshot
+        # is rewritten, note bodies go to a side file so startup reads only titles
+        # and tags; ORGANIZER_SHARDS=N spreads the book over N shard files instead
+        shards = os.environ.get("ORGANIZER_SHARDS")
+        if shards:
+            return book.save(full_path, shards=int(shards), delta=True)
+        return book.save(full_path, split_notes=True, delta=True)
+    elif backend == current:
+        book.save(full_path)
+    elif backend == "sqlite":
+        target = SqliteOrganizer(full_path).copy_from(book)
+        target.close()
+    else:
+        return book.to_organizer().save(full_path)
+    return []
+
+
+def format_conflicts(conflicts: list) -> list:
+    """One line per change that was not saved because another session changed the same entry."""
+    lines = []
+    for kind, key, mine in conflicts:
+        what = "Contact" if kind == "contacts" else "Note"
+        lost = "your deletion" if mine is None else f"your version {json.dumps(mine, ensure_ascii=False)}"
+        lines.append(f"{' ' * INDENT}{Fore.YELLOW}{what} {key} was changed in another session, "
+                     f"kept that version; {lost} was not saved.{Style.RESET_ALL}")
+    return lines
+
+
+@profiled("handlers.load_data")
+def load_data(filename=None, journal=True, backend="pickle"):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {backend!r}, choose from {', '.join(BACKENDS)}")
+    full_path = get_data_path(filename or BACKENDS[backend])
+    if backend == "sqlite":
+        from organizer.sqlite_store import SqliteOrganizer
+        return SqliteOrganizer.load(full_path)
+    return Organizer.load(full_path, journal=journal)
 
 
 @input_error
@@ -228,7 +297,7 @@ def add_note(book: Organizer) -> str:
     if tags_input:
         for tag in [t.strip() for t in tags_input.split(',') if t.strip()]:
             try:
-                note.tags.append(tag)
+                note.add_tag(tag)
             except ValueError as e:
                 print(e)
 
@@ -242,17 +311,16 @@ def search_contact(book: Organizer) -> str:
     if query is None:
         return ""
 
-    query = query.lower()
-    results = []
-
-    for name, record in book.contacts.items():
-        name_match = query in name.lower()
-        phone_match = record.phone and query in record.phone.value.lower()
+    results = [" " * INDENT + str(record) for record in book.search_contacts(query)]
+    if results:
+        return "\n".join(results)
 
-        if name_match or phone_match:
-            results.append(" " * INDENT + str(record))
-
-    return "\n".join(results) if results else " " * INDENT + "No matches found."
+    # Nothing contains the query as typed; offer the names closest to it
+    similar = [" " * INDENT + str(record) for record in book.fuzzy_contacts(query)]
+    if similar:
+        return "\n".join([f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}No exact matches. Did you mean:{Style.RESET_ALL}",
+                          *similar])
+    return " " * INDENT + "No matches found."
 
 
 @input_error
@@ -267,18 +335,23 @@ def delete_contact(book: Organizer) -> str:
         if confirmation is None or confirmation.lower() != 'y':
             return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Deletion cancelled.{Style.RESET_ALL}"
 
-        book.delete_contact(name)
+        book.delete_contact(record.name.value)
         return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Contact was deleted{Style.RESET_ALL}"
     raise KeyError()
 
 
-def list_notes(book: Organizer):
-    book.show_notes()
-    return
+@profiled("handlers.list_notes")
+def list_notes(book: Organizer, page_size: int = PAGE_SIZE, offset: int = 0):
+    if not book.notes:
+        book.show_notes()
+        return
+    page_through(book.show_notes, len(book.notes), page_size, offset)
 
 
+@profiled("handlers.search_notes")
 def search_notes(book: Organizer) -> str:
-    choice = safe_input("Do you want to search tags (1) or text (2). Enter 1 or 2: ", allow_empty=False)
+    choice = safe_input("Do you want to search tags (1), text (2) or best matches (3). Enter 1, 2 or 3: ",
+                        allow_empty=False)
     if choice is None or choice == "/":
         return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Search was canceled{Style.RESET_ALL}"
 
@@ -289,15 +362,10 @@ def search_notes(book: Organizer) -> str:
 
         tags = [tag.strip() for tag in tags_input.split(',') if tag.strip()]
 
-        found_notes_set = set()
-
-        for tag in tags:
-            notes = book.find_notes_by_tags(tag)
-            if notes:
-                found_notes_set.update(notes)
+        titles = book.find_note_titles_by_tags(tags)
 
-        if found_notes_set:
-            return "\n".join(sorted(found_notes_set))
+        if titles:
+            return "\n".join(f"{' ' * INDENT}{str(book.notes[title])}" for title in sorted(titles))
         else:
             return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Notes were not found{Style.RESET_ALL}"
 
@@ -311,13 +379,29 @@ def search_notes(book: Organizer) -> str:
             return "\n".join(str(note) for note in notes)
         else:
             return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Notes were not found{Style.RESET_ALL}"
+
+    elif choice == "3":
+        text = safe_input("Enter words to search for: ", allow_empty=False)
+        if text is None:
+            return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Search was canceled{Style.RESET_ALL}"
+
+        limit = safe_input("How many results to show? (10):", allow_empty=True)
+        if limit is None:
+            return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Search was canceled{Style.RESET_ALL}"
+
+        notes = book.rank_notes(text, int(limit) if limit.isdigit() else 10)
+        if notes:
+            return "\n".join(f"{' ' * INDENT}{str(note)}" for note in notes)
+        else:
+            return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Notes were not found{Style.RESET_ALL}"
     else:
         return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Invalid choice.{Style.RESET_ALL}"
 
 
+@profiled("handlers.edit_note")
 def edit_note(book: Organizer) -> Optional[str]:
     notes = book.notes
-    book.show_notes()
+    list_notes(book)
     if not notes:
         return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}No notes to edit.{Style.RESET_ALL}"
 
@@ -326,8 +410,10 @@ def edit_note(book: Organizer) -> Optional[str]:
         return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Edit cancelled.{Style.RESET_ALL}"
     try:
         selected_index = int(selected_index_input)
-        note = list(notes.values())[selected_index]
-    except (ValueError, IndexError):
+        if selected_index < 0:
+            raise ValueError(selected_index)
+        _, note = next(book.iter_notes(selected_index, 1))
+    except (ValueError, StopIteration):
         print("Invalid selection.")
         return None
 
@@ -339,7 +425,10 @@ def edit_note(book: Organizer) -> Optional[str]:
     if new_title is None:
         return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Edit cancelled.{Style.RESET_ALL}"
     if new_title:
-        note.title = length_validator(new_title)
+        try:
+            note.title = length_validator(new_title)
+        except KeyError:
+            return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Note with this title already exists.{Style.RESET_ALL}"
         changes_made = True
 
     new_description = safe_input("Update Note or skip: ", allow_empty=True)
@@ -383,7 +472,7 @@ def edit_note(book: Organizer) -> Optional[str]:
                     if not new_tag:
                         break
                     try:
-                        note.tags.append(new_tag)
+                        note.add_tag(new_tag)
                         changes_made = True
                         print(f"{' ' * (INDENT * 2)}{Fore.LIGHTBLACK_EX}Tag added.{Style.RESET_ALL}")
                     except ValueError as e:
@@ -409,7 +498,7 @@ def edit_note(book: Organizer) -> Optional[str]:
                     new_tag_value = level3_input("Enter new value for the tag: ")
                     if new_tag_value is None:
                         continue
-                    note.tags[tag_index] = new_tag_value
+                    note.change_tag(tag_index, new_tag_value)
                     changes_made = True
                     print(f"{' ' * (INDENT * 2)}{Fore.LIGHTBLACK_EX}Tag updated.{Style.RESET_ALL}")
                 except (ValueError, IndexError):
@@ -432,7 +521,7 @@ def edit_note(book: Organizer) -> Optional[str]:
                     if tag_index < 0 or tag_index >= len(note.tags):
                         print(f"{' ' * (INDENT * 2)}{Fore.LIGHTBLACK_EX}Invalid tag number.{Style.RESET_ALL}")
                         continue
-                    deleted_tag = note.tags.pop(tag_index)
+                    deleted_tag = note.remove_tag(tag_index)
                     changes_made = True
                     print(
                         f"{' ' * (INDENT * 2)}{Fore.LIGHTBLACK_EX}Tag '{deleted_tag}' has been deleted.{Style.RESET_ALL}")
@@ -445,6 +534,7 @@ def edit_note(book: Organizer) -> Optional[str]:
         return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}No changes made to note.{Style.RESET_ALL}"
 
 
+@profiled("handlers.delete_note")
 def delete_note(book: Organizer) -> str:
     try:
         title = safe_input("Enter a title of note to delete: ", allow_empty=False)
@@ -452,6 +542,10 @@ def delete_note(book: Organizer) -> str:
             return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Delete was cancelled{Style.RESET_ALL}"
         note = book.find_note(title)
         if note:
+            confirmation = safe_input(f"Do you want to delete Note '{title}'? (Y/N): ", allow_empty=False)
+            if confirmation is None or confirmation.lower() != 'y':
+                return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Deletion cancelled.{Style.RESET_ALL}"
+
             book.delete_note(title)
             return f"{' ' * INDENT}{Fore.LIGHTBLACK_EX}Note was deleted{Style.RESET_ALL}"
         else:
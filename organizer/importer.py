@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""organizer-import: bulk-load contacts from CSV or vCard files."""
+import argparse
+import csv
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from organizer import handlers
+from organizer.entities import Record
+from organizer.validators import validate_addresses, validate_dates, validate_emails, validate_lengths, validate_phones
+
+# Rows validated per worker task and added to the book in one go
+BATCH_SIZE = 5000
+
+FIELDS = ('name', 'phone', 'birthday', 'email', 'address')
+
+# CSV header spellings seen in CRM exports, lowercased
+CSV_COLUMNS = {
+    'name': 'name', 'full name': 'name', 'fn': 'name',
+    'phone': 'phone', 'phone number': 'phone', 'mobile': 'phone', 'tel': 'phone',
+    'birthday': 'birthday', 'birth date': 'birthday', 'date of birth': 'birthday', 'bday': 'birthday',
+    'email': 'email', 'e-mail': 'email', 'email address': 'email',
+    'address': 'address',
+}
+
+VCARD_PROPERTIES = {'FN': 'name', 'TEL': 'phone', 'BDAY': 'birthday', 'EMAIL': 'email', 'ADR': 'address'}
+
+# Separators people type into phone numbers; what is left must pass the phone validator
+PHONE_NOISE = re.compile(r'[\s().-]')
+
+
+def read_csv(path: str):
+    """Yield (line number, row) with the row keyed by FIELDS; unknown columns are ignored."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [CSV_COLUMNS.get(column.strip().lower()) for column in header]
+        for values in reader:
+            if not any(values):
+                continue
+            row = {}
+            for field, value in zip(columns, values):
+                if field and field not in row:
+                    row[field] = value.strip()
+            yield reader.line_num, row
+
+
+def _unfolded(f):
+    """Yield (line number, logical line) of a vCard file, joining folded continuation lines."""
+    start, current = 0, None
+    for line_no, line in enumerate(f, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        start, current = line_no, line
+    if current is not None:
+        yield start, current
+
+
+def _vcard_text(value: str) -> str:
+    return value.replace("\\n", " ").replace("\\N", " ").replace("\\,", ",").replace("\\;", ";").strip()
+
+
+def _vcard_value(field: str, value: str) -> str:
+    if field == 'birthday':
+        digits = value[:10].replace("-", "")
+        if len(digits) == 8 and digits.isdigit():
+            return f"{digits[6:8]}.{digits[4:6]}.{digits[:4]}"
+        return value
+    if field == 'address':
+        # post office box; extended; street; locality; region; postal code; country
+        parts = re.split(r'(?<!\\);', value)
+        return ", ".join(_vcard_text(part) for part in parts if part.strip())
+    return _vcard_text(value)
+
+
+def read_vcard(path: str):
+    """Yield (line number of BEGIN:VCARD, row) for every card; the first value of each property wins."""
+    card, start = None, 0
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for line_no, line in _unfolded(f):
+            key, _, value = line.partition(":")
+            prop = key.split(";")[0].split(".")[-1].upper()
+            if prop == "BEGIN" and value.strip().upper() == "VCARD":
+                card, start = {}, line_no
+            elif card is None:
+                continue
+            elif prop == "END":
+                yield start, card
+                card = None
+            elif prop == "N" and "n" not in card:
+                family, given = (value.split(";") + ["", ""])[:2]
+                card["n"] = " ".join(_vcard_text(part) for part in (given, family) if part.strip())
+            elif prop in VCARD_PROPERTIES and VCARD_PROPERTIES[prop] not in card:
+                field = VCARD_PROPERTIES[prop]
+                card[field] = _vcard_value(field, value)
+
+
+def validate_batch(rows: list):
+    """Worker task: returns (records, rejects) as (line, record) and (line, reason, row) lists.
+
+    Each field is checked for the whole batch at once by the batch validators,
+    which report errors as values instead of raising them.
+    """
+    columns = (
+        validate_lengths([row.get("name") or row.get("n") or "" for _, row in rows]),
+        validate_phones([PHONE_NOISE.sub("", row.get("phone") or "") for _, row in rows]),
+        validate_dates([row.get("birthday") for _, row in rows]),
+        validate_emails([row.get("email") for _, row in rows]),
+        validate_addresses([row.get("address") for _, row in rows]),
+    )
+    records, rejects = [], []
+    for (line_no, row), *results in zip(rows, *columns):
+        if any(error for _, error in results):
+            reason = "; ".join(f"{field}: {error}" for field, (_, error) in zip(FIELDS, results) if error)
+            rejects.append((line_no, reason, row))
+        else:
+            records.append((line_no, Record.from_validated(*(value for value, _ in results))))
+    return records, rejects
+
+
+def batches(rows, size: int):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def validated(rows, workers: int, batch_size: int = BATCH_SIZE):
+    """validate_batch results in input order; at most two batches per worker are in flight."""
+    if workers <= 1:
+        for batch in batches(rows, batch_size):
+            yield validate_batch(batch)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in batches(rows, batch_size):
+            pending.append(pool.submit(validate_batch, batch))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class Rejects:
+    """CSV of rows that were not imported, opened on the first reject."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def add(self, source: str, line_no: int, reason: str, row: dict):
+        if self._writer is None:
+            self._file = open(self.path, "w", encoding="utf-8", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(("source", "line", "reason") + FIELDS)
+        name = row.get("name") or row.get("n") or ""
+        self._writer.writerow((source, line_no, reason, name) + tuple(row.get(field, "") for field in FIELDS[1:]))
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def import_files(book, paths: list, rejects: Rejects, file_format: str = None,
+                 workers: int = 1, batch_size: int = BATCH_SIZE) -> int:
+    """Import every file into book; returns the number of contacts added."""
+    imported = 0
+    for path in paths:
+        kind = file_format or ("vcard" if path.lower().endswith((".vcf", ".vcard")) else "csv")
+        rows = read_vcard(path) if kind == "vcard" else read_csv(path)
+        for records, invalid in validated(rows, workers, batch_size):
+            for line_no, reason, row in invalid:
+                rejects.add(path, line_no, reason, row)
+            lines = {id(record): line_no for line_no, record in records}
+            duplicates = book.add_contacts(record for _, record in records)
+            for record, reason in duplicates:
+                rejects.add(path, lines[id(record)], reason, record.to_dict())
+            imported += len(records) - len(duplicates)
+    return imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="organizer-import", description="Import contacts from CSV or vCard files.")
+    parser.add_argument("files", nargs="+", help="CSV (header row required) or .vcf files")
+    parser.add_argument("--format", choices=("csv", "vcard"), help="file format (default: by extension)")
+    parser.add_argument("--backend", choices=tuple(handlers.BACKENDS),
+                        default=os.environ.get("ORGANIZER_BACKEND", "pickle"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="validation processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--rejects", help="where to write rows that were not imported "
+                                          "(default: <first file>.rejects.csv)")
+    args = parser.parse_args(argv)
+
+    book = handlers.load_data(backend=args.backend)
+    # Saved as one new snapshot at the end instead of journaling every row, so an
+    # interrupted import leaves organizer.pkl as it was (SQLite commits each batch)
+    journal, book._journal = book._journal, None
+
+    rejects = Rejects(args.rejects or f"{os.path.splitext(args.files[0])[0]}.rejects.csv")
+    try:
+        imported = import_files(book, args.files, rejects, args.format, args.workers, args.batch_size)
+    finally:
+        rejects.close()
+
+    book._journal = journal
+    handlers.save_data(book)
+    print(f"Imported {imported} contacts.")
+    if rejects.count:
+        print(f"{rejects.count} rows rejected, see {rejects.path}")
+
+
+if __name__ == "__main__":
+    main()
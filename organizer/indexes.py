@@ -0,0 +1,219 @@
+"""In-memory search structures kept up to date by Organizer."""
+import heapq
+import math
+import re
+from collections import Counter
+from operator import itemgetter
+from typing import Optional
+
+GRAM = 3
+WORD = re.compile(r'\w+')
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def tokenize(text: str) -> list:
+    return WORD.findall(text.lower())
+
+
+class TrigramIndex:
+    """Substring index: every 3-character slice of a text points to the keys containing it.
+
+    Texts themselves are not stored, callers pass them in and verify candidates.
+    """
+
+    def __init__(self):
+        self._grams = {}
+
+    def add(self, key, text: str):
+        for gram in trigrams(text):
+            self._grams.setdefault(gram, set()).add(key)
+
+    def remove(self, key, text: str):
+        for gram in trigrams(text):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+
+    def candidates(self, query: str) -> Optional[set]:
+        """Keys whose text may contain query; None if the query is too short to narrow anything."""
+        grams = trigrams(query)
+        if not grams:
+            return None
+
+        postings = sorted((self._grams.get(gram, ()) for gram in grams), key=len)
+        result = set(postings[0])
+        for keys in postings[1:]:
+            if not result:
+                break
+            result &= keys
+        return result
+
+
+class BM25Index:
+    """Okapi BM25 ranking over tokenized documents.
+
+    Like TrigramIndex it does not keep the documents: remove() needs the
+    tokens the document was added with.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # term -> {key: term frequency}
+        self._lengths = {}   # key -> document length in tokens
+        self._total_length = 0
+
+    def add(self, key, tokens: list):
+        for term, frequency in Counter(tokens).items():
+            self._postings.setdefault(term, {})[key] = frequency
+        self._lengths[key] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, key, tokens: list):
+        for term in set(tokens):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(key, 0)
+
+    def top(self, tokens: list, limit: int) -> list:
+        """The limit best (key, score) pairs for the query tokens, best first."""
+        if not self._lengths or limit <= 0:
+            return []
+
+        documents = len(self._lengths)
+        average_length = self._total_length / documents or 1
+        scores = {}
+        for term in set(tokens):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        # heap selection, the full result set is never sorted
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+
+def char_masks(pattern: str) -> dict:
+    """Character -> bit mask of its positions in pattern, for edit_distance."""
+    masks = {}
+    for i, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def edit_distance(pattern: str, text: str, masks: Optional[dict] = None) -> int:
+    """Levenshtein distance, computed a column at a time with bit vectors (Myers/Hyyrö).
+
+    One pass over text with a few integer operations per character; pass
+    char_masks(pattern) as masks when comparing one pattern to many texts.
+    """
+    if not pattern:
+        return len(text)
+    if masks is None:
+        masks = char_masks(pattern)
+    full = (1 << len(pattern)) - 1
+    last = 1 << (len(pattern) - 1)
+    plus, minus = full, 0  # vertical +1 and -1 deltas of the current column
+    score = len(pattern)
+    get = masks.get
+    for char in text:
+        eq = get(char, 0)
+        xv = eq | minus
+        xh = (((eq & plus) + plus) ^ plus) | eq
+        horizontal_plus = minus | ~(xh | plus)
+        horizontal_minus = plus & xh
+        if horizontal_plus & last:
+            score += 1
+        elif horizontal_minus & last:
+            score -= 1
+        horizontal_plus = (horizontal_plus << 1) | 1
+        plus = ((horizontal_minus << 1) | ~(xv | horizontal_plus)) & full
+        minus = horizontal_plus & xv
+    return score
+
+
+class BKTree:
+    """Burkhard-Keller tree: strings within an edit distance of a query without comparing it to all of them.
+
+    A node's children are keyed by their distance to it, so by the triangle
+    inequality a search only descends into children whose key is within the
+    search radius of the query's distance to the node. Removed keys stay as
+    routing nodes until they outnumber the live ones, then the tree is rebuilt.
+    """
+
+    def __init__(self, keys=()):
+        self._root = None
+        self._children = {}  # key -> {distance: child key}
+        self._live = set()
+        for key in keys:
+            self.add(key)
+
+    def __len__(self):
+        return len(self._live)
+
+    def add(self, key: str):
+        if self._root is None:
+            self._root = key
+            self._children[key] = {}
+            self._live.add(key)
+            return
+
+        masks = char_masks(key)
+        node = self._root
+        while True:
+            distance = edit_distance(key, node, masks)
+            if distance == 0:
+                self._live.add(key)
+                return
+            children = self._children[node]
+            child = children.get(distance)
+            if child is None:
+                children[distance] = key
+                self._children[key] = {}
+                self._live.add(key)
+                return
+            node = child
+
+    def remove(self, key: str):
+        self._live.discard(key)
+        if len(self._children) > 2 * len(self._live) + 16:
+            live = self._live
+            self.__init__(live)
+
+    def search(self, query: str, max_distance: int, limit: Optional[int] = None) -> list:
+        """Up to limit (distance, key) pairs within max_distance of query, closest first, ties by key."""
+        if self._root is None or limit == 0:
+            return []
+
+        masks = char_masks(query)
+        radius = max_distance
+        found = []
+        best = []  # negated distances of the limit closest keys so far; a full heap narrows the radius
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = edit_distance(query, node, masks)
+            if distance <= radius and node in self._live:
+                found.append((distance, node))
+                if limit is not None:
+                    if len(best) < limit:
+                        heapq.heappush(best, -distance)
+                    elif distance < -best[0]:
+                        heapq.heapreplace(best, -distance)
+                    if len(best) == limit:
+                        radius = -best[0]
+            for child_distance, child in self._children[node].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return heapq.nsmallest(limit, found) if limit is not None else sorted(found)
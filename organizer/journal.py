@@ -0,0 +1,102 @@
+"""Append-only log of Organizer changes, replayed on top of the last snapshot."""
+import json
+import os
+
+from organizer.locking import file_lock
+
+# Fold the journal into a fresh snapshot after this many entries
+COMPACT_EVERY = 1000
+
+
+def journal_path(snapshot_path: str) -> str:
+    return os.path.splitext(snapshot_path)[0] + ".journal"
+
+
+def disk_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def disk_inode(path: str):
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+class Journal:
+    """One JSON object per line, each describing a single change.
+
+    Entries are idempotent so replaying a journal that was already folded
+    into the snapshot (a crash between the two steps) is harmless. Several
+    processes may append to the same journal; `size` counts the bytes this
+    one has seen, so Organizer.save can tell when others wrote to it.
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self.path = journal_path(snapshot_path)
+        self.entries = 0
+        self.size = 0
+        self._file = None
+
+    def read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # A half-written last line from an interrupted session
+                        continue
+        except FileNotFoundError:
+            return
+
+    def replay(self, book) -> int:
+        replayed = 0
+        with file_lock(self.snapshot_path):
+            for entry in self.read():
+                book.apply_change(entry)
+                replayed += 1
+            self.size = disk_size(self.path)
+        self.entries = replayed
+        return replayed
+
+    def append(self, entry: dict):
+        self.extend((entry,))
+
+    def extend(self, entries):
+        """Append several entries with a single fsync."""
+        lines = [json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries]
+        data = "".join(lines).encode("utf-8")
+        with file_lock(self.snapshot_path):
+            if self._file is not None and os.fstat(self._file.fileno()).st_ino != disk_inode(self.path):
+                # Another process folded the journal into a new snapshot and removed it
+                self.close()
+                self.size = 0
+                self.entries = 0
+            if self._file is None:
+                self._file = open(self.path, "ab")
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self.size += len(data)
+        self.entries += len(lines)
+
+    def changed_elsewhere(self) -> bool:
+        """Whether another process wrote to or removed the journal since this one last looked."""
+        return disk_size(self.path) != self.size
+
+    def truncate(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.entries = 0
+        self.size = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
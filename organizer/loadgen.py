@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""organizer-loadgen: measure requests/sec and latency of a running organizer-serve.
+
+Keeps --connections keep-alive connections busy for --duration seconds with a
+mix of read requests (and, with --writes, contact adds and deletes). The
+summary goes to stderr and a JSON report to stdout or --output.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from organizer.seed import TAGS, WORDS
+
+READS = ("find_contact", "search_contact", "fuzzy_contact", "birthdays", "notes_text", "notes_tag", "notes_rank")
+
+
+class Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host: str, port: int, unix: str = None) -> 'Connection':
+        if unix:
+            return cls(*await asyncio.open_unix_connection(unix))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, method: str, path: str, payload=None):
+        """(status, decoded JSON body)."""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: organizer\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        length = 0
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return int(status_line.split(" ")[1]), json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+
+def make_request(kind: str, rng: random.Random, names: list, counter) -> tuple:
+    """(method, path, payload) for one request of the given kind."""
+    if kind == "find_contact":
+        return "GET", f"/contacts/{quote(rng.choice(names))}", None
+    if kind == "search_contact":
+        return "GET", f"/contacts?q={quote(rng.choice(names).split()[-1][:4])}&limit=20", None
+    if kind == "fuzzy_contact":
+        # A name with one character dropped
+        name = rng.choice(names)
+        cut = rng.randrange(len(name))
+        return "GET", f"/contacts?fuzzy={quote(name[:cut] + name[cut + 1:])}&limit=5", None
+    if kind == "birthdays":
+        return "GET", f"/birthdays?days={rng.choice((7, 30))}", None
+    if kind == "notes_text":
+        return "GET", f"/notes?text={quote(rng.choice(WORDS))}", None
+    if kind == "notes_tag":
+        return "GET", f"/notes?tag={quote(rng.choice(TAGS))}", None
+    if kind == "notes_rank":
+        return "GET", f"/notes?rank={quote(' '.join(rng.sample(WORDS, 2)))}&limit=10", None
+    name = f"Loadgen {next(counter)}"
+    if kind == "add_contact":
+        return "POST", "/contacts", {"name": name, "phone": f"{rng.randrange(10 ** 10):010}"}
+    raise ValueError(f"Unknown request kind {kind!r}")
+
+
+async def worker(args, kinds: list, names: list, seed: int, deadline: float, counter, latencies: dict, errors: dict):
+    rng = random.Random(seed)
+    connection = await Connection.open(args.host, args.port, args.unix)
+    added = []
+    try:
+        while time.perf_counter() < deadline:
+            kind = rng.choice(kinds)
+            if kind == "delete_contact":
+                if not added:
+                    continue
+                method, path, payload = "DELETE", f"/contacts/{quote(added.pop())}", None
+            else:
+                method, path, payload = make_request(kind, rng, names, counter)
+            start = time.perf_counter()
+            status, body = await connection.request(method, path, payload)
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            if status >= 500 or (status >= 400 and kind != "find_contact"):
+                errors[kind] = errors.get(kind, 0) + 1
+            elif kind == "add_contact":
+                added.append(body["name"])
+    finally:
+        # Don't leave test contacts behind in the served book; these deletes are not timed
+        try:
+            for name in added:
+                await connection.request("DELETE", f"/contacts/{quote(name)}")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        connection.close()
+
+
+def summary(latencies: list, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "requests_per_s": len(ordered) / elapsed,
+        "mean_ms": statistics.mean(ordered) * 1e3,
+        "p50_ms": ordered[len(ordered) // 2] * 1e3,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3,
+        "max_ms": ordered[-1] * 1e3,
+    }
+
+
+async def run(args) -> dict:
+    connection = await Connection.open(args.host, args.port, args.unix)
+    _, contacts = await connection.request("GET", f"/contacts?q=&limit={args.names}")
+    connection.close()
+    names = [contact["name"] for contact in contacts] or ["nobody"]
+
+    kinds = list(args.only or READS)
+    if args.writes:
+        kinds += ["add_contact", "delete_contact"]
+    counter = iter(range(10 ** 12))
+    latencies, errors = {}, {}
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(args, kinds, names, args.seed + i, start + args.duration,
+                                  counter, latencies, errors) for i in range(args.connections)))
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    return {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "connections": args.connections,
+        "duration_s": elapsed,
+        "total": summary(all_latencies, elapsed) if all_latencies else {},
+        "by_request": {kind: summary(values, elapsed) for kind, values in sorted(latencies.items())},
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="organizer-loadgen", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket instead")
+    parser.add_argument("-c", "--connections", type=int, default=16)
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="seconds (default 10)")
+    parser.add_argument("--only", nargs="+", choices=READS, help="request kinds to send (default: all reads)")
+    parser.add_argument("--writes", action="store_true", help="mix in contact adds and deletes")
+    parser.add_argument("--names", type=int, default=1000, help="contact names fetched up front for lookups")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="JSON report file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    total = report["total"]
+    if total:
+        print(f"{total['requests']} requests in {report['duration_s']:.1f}s: {total['requests_per_s']:.0f} req/s, "
+              f"p50 {total['p50_ms']:.2f} ms, p99 {total['p99_ms']:.2f} ms", file=sys.stderr)
+    for kind, stats in report["by_request"].items():
+        print(f"  {kind:<16} {stats['requests']:>8} req  p50 {stats['p50_ms']:7.2f} ms  "
+              f"p99 {stats['p99_ms']:7.2f} ms", file=sys.stderr)
+    if report["errors"]:
+        print(f"errors: {report['errors']}", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Advisory lock shared by every organizer process working on the same snapshot.
+
+The lock is taken only while the snapshot or its journal is read or
+written, never for a whole session.
+"""
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_path(snapshot_path: str) -> str:
+    return os.path.splitext(snapshot_path)[0] + ".lock"
+
+
+class FileLock:
+    """Exclusive lock on a file; reentrant, so save() can run from inside a journal append."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._depth = 0
+        # Threads of one process (the autosave worker and the menu) share the lock file
+        self._mutex = threading.RLock()
+
+    def acquire(self):
+        self._mutex.acquire()
+        if self._depth == 0:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            except FileNotFoundError:
+                # No directory yet, so no snapshot that anyone else could be using
+                fd = None
+            if fd is not None:
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    else:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                except BaseException:
+                    os.close(fd)
+                    self._mutex.release()
+                    raise
+            self._fd = fd
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            os.close(self._fd)
+            self._fd = None
+        self._mutex.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+_locks = {}
+
+
+def file_lock(snapshot_path: str) -> FileLock:
+    """The process-wide lock object for snapshot_path."""
+    path = os.path.abspath(lock_path(snapshot_path))
+    lock = _locks.get(path)
+    if lock is None:
+        lock = _locks[path] = FileLock(path)
+    return lock
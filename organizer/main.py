@@ -1,9 +1,43 @@
 #!/usr/bin/env python3
-from organizer import handlers
+import contextlib
+import os
+import sys
+from organizer import handlers, profiling
 
 
-def main():
-    organizer = handlers.load_data()
+def main(argv=None):
+    # ORGANIZER_BACKEND=sqlite keeps the book in ~/.organizer/organizer.db instead of organizer.pkl
+    backend = os.environ.get("ORGANIZER_BACKEND", "pickle")
+    # ORGANIZER_PROFILE=1 profiles into ~/.organizer/profile.json, any other value is the file to write
+    profile = os.environ.get(profiling.ENV_VAR)
+    argv = sys.argv[1:] if argv is None else argv
+    args = None
+    if argv:
+        # argparse is only imported when there are arguments to parse
+        from organizer import cli
+        args = cli.build_parser().parse_args(argv)
+        backend = args.backend
+        profile = args.profile or profile
+
+    if profile:
+        profiling.enable(handlers.get_data_path("profile.json") if profile in ("1", True) else profile)
+    if args is not None and args.command is not None:
+        sys.exit(cli.run(args))
+
+    from organizer import autosave
+
+    organizer = handlers.load_data(backend=backend)
+    # The sqlite backend commits every change itself
+    def save():
+        # Changes that clashed with another session's are reported, not saved
+        for line in handlers.format_conflicts(handlers.save_data(organizer)):
+            print(line)
+
+    saver = None
+    if backend == "pickle" and os.environ.get(autosave.ENV_VAR, "1") != "0":
+        saver = autosave.AutoSaver(organizer, save).start()
+    # Handlers hold the autosave lock so a snapshot never sees a half-done edit
+    lock = saver.lock if saver is not None else contextlib.nullcontext()
 
     def print_menu(_=None):
         menu_text = "\nMainMenu:"
@@ -31,21 +65,34 @@ def main():
     print('Organizer v1.0')
     print(print_menu())
 
-    while True:
-        choice = input("Organizer: ").strip()
-        if choice not in commands:
-            print("Invalid selection. Try again.")
-            continue
-
-        desc, handler = commands[choice]
-        if choice == "0":
-            handlers.save_data(organizer)
-            print("Data saved. Goodbye!")
-            break
-
-        result = handler(organizer)
-        if result:
-            print(result)
+    try:
+        while True:
+            choice = input("Organizer: ").strip()
+            if choice == "prof":
+                # not listed in the menu
+                print(profiling.format_report())
+                continue
+            if choice not in commands:
+                print("Invalid selection. Try again.")
+                continue
+
+            desc, handler = commands[choice]
+            if choice == "0":
+                with lock:
+                    save()
+                print("Data saved. Goodbye!")
+                break
+
+            with lock:
+                result = handler(organizer)
+            if result:
+                print(result)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        # Also reached on Ctrl-C and SIGTERM: write what has not been saved yet
+        if saver is not None and saver.close():
+            print("Changes saved.")
 
 
 if __name__ == "__main__":
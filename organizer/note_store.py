@@ -0,0 +1,38 @@
+"""Note bodies kept outside organizer.pkl in a memory-mapped data file."""
+import mmap
+import os
+
+
+def write_bodies(path: str, bodies) -> list:
+    """Write the bodies one after another as UTF-8; returns their (offset, length) in the file."""
+    refs = []
+    offset = 0
+    with open(path, "wb") as f:
+        for body in bodies:
+            data = body.encode("utf-8")
+            f.write(data)
+            refs.append((offset, len(data)))
+            offset += len(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return refs
+
+
+class NoteBodies:
+    """Read-only access to a data file written by write_bodies."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = b""  # mmap refuses empty files
+
+    def read(self, offset: int, length: int) -> str:
+        return self._map[offset:offset + length].decode("utf-8")
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,33 @@
+"""Buffered writing of long listings to the terminal or a pipe."""
+import os
+import sys
+from itertools import islice
+
+# Rendered lines joined into a single write
+CHUNK_LINES = 256
+
+
+def write_lines(lines, stream=None, end: str = "\n") -> bool:
+    """Write lines as they are produced, CHUNK_LINES at a time, each followed by end.
+
+    Returns False if the reader went away (e.g. `| head`), so callers can stop rendering.
+    """
+    stream = stream or sys.stdout
+    lines = iter(lines)
+    try:
+        while True:
+            chunk = list(islice(lines, CHUNK_LINES))
+            if not chunk:
+                break
+            stream.write(end.join(chunk) + end)
+        stream.flush()
+    except BrokenPipeError:
+        if stream is sys.stdout:
+            discard_stdout()
+        return False
+    return True
+
+
+def discard_stdout():
+    """Point stdout at /dev/null after its reader went away, otherwise Python fails again flushing it at exit."""
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
@@ -0,0 +1,131 @@
+"""Opt-in timing and allocation statistics for handlers and Organizer methods.
+
+Enabled with the ORGANIZER_PROFILE environment variable or `organizer --profile`.
+Each profiled call adds its wall time and tracemalloc peak (memory allocated
+on top of what was in use when it started) to a per-name total. The totals are
+shown by the hidden `prof` menu command and written as JSON when the program exits.
+"""
+import atexit
+import functools
+import json
+import time
+import tracemalloc
+
+ENV_VAR = "ORGANIZER_PROFILE"
+
+_enabled = False
+_stats = {}    # name -> {"calls", "total_s", "max_s", "peak_bytes"}
+_gauges = {}   # name -> last reported value, e.g. the size of the last snapshot written
+_frames = []   # [start traced bytes, highest peak seen before a nested call reset it]
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(dump_path: str = None):
+    """Start collecting; with dump_path the report is written there at exit."""
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    tracemalloc.start()
+    from organizer.entities import Organizer
+    for cls in (Organizer, *Organizer.__subclasses__()):
+        instrument(cls)
+    if dump_path:
+        atexit.register(dump, dump_path)
+
+
+def _measure(name: str, func, args, kwargs):
+    current, peak = tracemalloc.get_traced_memory()
+    if _frames:
+        # reset_peak below loses the caller's peak, keep it on the caller's frame
+        _frames[-1][1] = max(_frames[-1][1], peak)
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        # Python < 3.9: clear_traces also forgets the blocks in use, so traced sizes
+        # restart at 0; move the open frames to the new baseline
+        tracemalloc.clear_traces()
+        for open_frame in _frames:
+            open_frame[0] -= current
+            open_frame[1] -= current
+        current = 0
+    frame = [current, 0]
+    _frames.append(frame)
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        _frames.pop()
+        peak = max(tracemalloc.get_traced_memory()[1], frame[1])
+        if _frames:
+            _frames[-1][1] = max(_frames[-1][1], peak)
+        stats = _stats.setdefault(name, {"calls": 0, "total_s": 0.0, "max_s": 0.0, "peak_bytes": 0})
+        stats["calls"] += 1
+        stats["total_s"] += elapsed
+        stats["max_s"] = max(stats["max_s"], elapsed)
+        stats["peak_bytes"] = max(stats["peak_bytes"], peak - frame[0])
+
+
+def profiled(name: str):
+    """Decorator recording calls under name while profiling is enabled; a plain call otherwise."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            return _measure(name, func, args, kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument(cls):
+    """Profile the public methods cls defines itself, load and save included.
+
+    Done only once profiling is enabled, so the methods carry no wrapper otherwise.
+    """
+    if not _enabled or cls.__dict__.get("_profiled"):
+        return
+    for attribute, value in list(vars(cls).items()):
+        if attribute.startswith("_"):
+            continue
+        name = f"{cls.__name__}.{attribute}"
+        if isinstance(value, classmethod):
+            setattr(cls, attribute, classmethod(profiled(name)(value.__func__)))
+        elif callable(value):
+            setattr(cls, attribute, profiled(name)(value))
+    cls._profiled = True
+
+
+def gauge(name: str, value):
+    if _enabled:
+        _gauges[name] = value
+
+
+def report() -> dict:
+    return {
+        "calls": {name: dict(stats) for name, stats in
+                  sorted(_stats.items(), key=lambda item: item[1]["total_s"], reverse=True)},
+        "gauges": dict(_gauges),
+    }
+
+
+def format_report() -> str:
+    if not _enabled:
+        return f"Profiling is off, start with {ENV_VAR}=1 or --profile."
+    lines = [f"{'name':<40} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'peak KiB':>9}"]
+    for name, stats in report()["calls"].items():
+        lines.append(f"{name:<40} {stats['calls']:>7} {stats['total_s'] * 1e3:>10.2f} "
+                     f"{stats['total_s'] / stats['calls'] * 1e3:>9.3f} {stats['max_s'] * 1e3:>9.2f} "
+                     f"{stats['peak_bytes'] / 1024:>9.1f}")
+    for name, value in _gauges.items():
+        lines.append(f"{name}: {value}")
+    return "\n".join(lines)
+
+
+def dump(path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=2)
@@ -1,6 +1,84 @@
 #!/usr/bin/env python3
 from organizer.entities import Record, Note, Organizer
+from organizer.journal import Journal
+from datetime import date
+from itertools import accumulate
+import argparse
 import os
+import random
+
+FIRST_NAMES = ("James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William",
+               "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah",
+               "Charles", "Karen", "Daniel", "Nancy", "Matthew", "Lisa", "Anthony", "Betty", "Mark", "Sandra",
+               "Olena", "Taras", "Iryna", "Andriy", "Sofia", "Dmytro", "Anna", "Maksym", "Kateryna", "Oleh",
+               "Emma", "Noah", "Olivia", "Liam", "Ava", "Lucas", "Mia", "Leo", "Chloe", "Hugo")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+              "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Taylor", "Thomas", "Moore", "Jackson",
+              "Martin", "Lee", "Thompson", "White", "Harris", "Clark", "Lewis", "Walker", "Young", "Allen",
+              "Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko", "Melnyk", "Boyko", "Koval",
+              "Dubois", "Moreau", "Laurent", "Schmidt", "Schneider", "Fischer", "Weber", "Rossi", "Russo")
+STREETS = ("Main St", "Oak Ave", "Pine Rd", "Maple Dr", "Cedar Ln", "Birch Ave", "Spruce St", "Elm Blvd",
+           "Walnut Way", "Chestnut Pl", "Khreshchatyk St", "Shevchenko Ave", "Lesi Ukrainky Blvd", "High St")
+DOMAINS = ("example.com", "mail.com", "post.net", "inbox.org", "company.io")
+
+# Ranked by how often they are used; picks follow a Zipf-like 1/rank distribution
+TAGS = ("work", "personal", "ideas", "shopping", "todo", "meetings", "family", "travel", "books", "health",
+        "finance", "projects", "recipes", "birthdays", "gifts", "reading", "movies", "music", "home", "car",
+        "garden", "sport", "study", "python", "events", "urgent", "someday", "links", "quotes", "bills")
+WORDS = ("the", "to", "and", "of", "a", "for", "with", "on", "call", "meeting", "buy", "plan", "check",
+         "send", "review", "team", "project", "ideas", "list", "next", "week", "email", "report", "budget",
+         "book", "trip", "tickets", "milk", "bread", "doctor", "birthday", "gift", "update", "notes",
+         "deadline", "draft", "client", "invoice", "schedule", "weekend", "dinner", "recipe", "garden",
+         "repair", "car", "insurance", "renew", "library", "course", "lecture", "python", "release")
+
+
+def _zipf_weights(count: int) -> list:
+    return list(accumulate(1 / rank for rank in range(1, count + 1)))
+
+
+def generate_organizer(contacts: int, notes: int, seed: int = 42) -> Organizer:
+    """A book of synthetic contacts and notes; the same seed always gives the same book.
+
+    Most contacts have a phone and a birthday, fewer an email or address.
+    Note lengths vary widely and words and tags are drawn with a 1/rank
+    frequency, so a few of them are common and most are rare.
+    """
+    rng = random.Random(seed)
+    book = Organizer()
+
+    taken = {}
+    first_day = date(1950, 1, 1).toordinal()
+    last_day = date(2008, 12, 31).toordinal()
+    batch = []
+    for _ in range(contacts):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if name in taken:
+            taken[name] += 1
+            name = f"{name} {taken[name]}"
+        else:
+            taken[name] = 1
+        login = name.lower().replace(" ", ".")
+        batch.append(Record.from_validated(
+            name,
+            phone=f"{rng.randrange(10 ** 9, 10 ** 10)}" if rng.random() < 0.9 else None,
+            birthday=date.fromordinal(rng.randint(first_day, last_day)) if rng.random() < 0.7 else None,
+            email=f"{login}@{rng.choice(DOMAINS)}" if rng.random() < 0.6 else None,
+            address=f"{rng.randint(1, 999)} {rng.choice(STREETS)}" if rng.random() < 0.4 else None,
+        ))
+        if len(batch) == 10_000:
+            book.add_contacts(batch)
+            batch = []
+    book.add_contacts(batch)
+
+    word_weights = _zipf_weights(len(WORDS))
+    tag_weights = _zipf_weights(len(TAGS))
+    for number in range(notes):
+        words = rng.choices(WORDS, cum_weights=word_weights, k=max(3, int(rng.lognormvariate(3, 1))))
+        tags = set(rng.choices(TAGS, cum_weights=tag_weights, k=rng.choice((0, 1, 1, 2, 2, 3, 4))))
+        title = f"{' '.join(words[:3]).capitalize()} {number}"
+        book.add_note(Note(title, " ".join(words).capitalize() + ".", sorted(tags)))
+    return book
+
 
 def get_data_path(filename="organizer.pkl"):
     data_dir = os.path.join(os.path.expanduser("~"), ".organizer")
@@ -64,10 +142,30 @@ def seed_demo_data():
     # Save the organizer
     data_path = get_data_path()
     organizer.save(data_path)
+    # Changes logged against the previous data must not be replayed on the demo data
+    Journal(data_path).truncate()
     print(f"Demo contacts and notes added to {data_path}")
     return organizer
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="organizer-seed", description="Fill ~/.organizer with demo data.")
+    parser.add_argument("--contacts", type=int, help="generate this many synthetic contacts instead of the demo set")
+    parser.add_argument("--notes", type=int, default=0, help="and this many synthetic notes")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (default 42)")
+    args = parser.parse_args(argv)
+
+    if args.contacts is None and not args.notes:
+        seed_demo_data()
+        return
+
+    organizer = generate_organizer(args.contacts or 0, args.notes, args.seed)
+    data_path = get_data_path()
+    organizer.save(data_path, split_notes=True)
+    Journal(data_path).truncate()
+    print(f"{len(organizer.contacts)} contacts and {len(organizer.notes)} notes written to {data_path}")
+
+
 if __name__ == "__main__":
     data_path = get_data_path()
     if os.path.exists(data_path):
@@ -76,4 +174,4 @@ if __name__ == "__main__":
             print("Cancelled.")
             exit()
 
-    seed_demo_data()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""organizer-serve: a local HTTP/JSON API over one in-memory Organizer.
+
+    GET    /contacts/<name>                     find_contact
+    GET    /contacts?q=<text>[&limit=N]         contacts whose name or phone contains text
+    GET    /contacts?fuzzy=<name>[&distance=2][&limit=10]  names with at most distance typos
+    GET    /birthdays[?days=7]                  get_upcoming_birthdays
+    GET    /notes/<title>                       find_note
+    GET    /notes?text=<text>                   notes containing text
+    GET    /notes?tag=<tag>[&tag=..][&all=1]    notes by tag
+    GET    /notes?rank=<words>[&limit=10]       best matching notes
+    POST   /contacts   {"name", "phone", "birthday", "email", "address"}
+    DELETE /contacts/<name>
+    POST   /notes      {"title", "value", "tags"}
+    DELETE /notes/<title>
+
+Writes use the book one at a time, holding a lock. A write is in the
+journal (fsync'ed) before the response is sent, and every COMPACT_EVERY
+entries the journal is folded into the snapshot; both run on a worker
+thread, so meanwhile the event loop keeps accepting connections and reading
+requests. Reads run on the loop without the lock, they wait only while a
+write is running on its thread, so they never see a half-applied write nor
+queue behind the writes waiting for the lock. A SQLite book is written on
+the loop instead, its connection only works on the thread that opened it.
+"""
+import asyncio
+import json
+import os
+import signal
+import traceback
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from organizer import handlers
+from organizer.entities import Note, Record
+
+DEFAULT_PORT = 8765
+# Largest request head and body accepted
+MAX_HEAD = 16 * 1024
+MAX_BODY = 1024 * 1024
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+CONTACT_FIELDS = ("name", "phone", "birthday", "email", "address")
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _int(query: dict, name: str, default):
+    try:
+        return int(query[name][0]) if name in query else default
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a number")
+
+
+def _check_strings(data: dict, fields):
+    for field in fields:
+        if data.get(field) is not None and not isinstance(data[field], str):
+            raise HTTPError(400, f"{field} must be a string")
+
+
+class OrganizerAPI:
+    """Routes requests to the book; run() is called by the connection handler for each request."""
+
+    def __init__(self, book):
+        from organizer.sqlite_store import SqliteOrganizer
+
+        self.book = book
+        # Held by each write while it uses the book, across its worker thread run
+        self.lock = asyncio.Lock()
+        # Cleared while a write runs on a worker thread, reads wait for it
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.threaded = not isinstance(book, SqliteOrganizer)
+        self.routes = {
+            ("GET", "contacts"): self.get_contacts,
+            ("POST", "contacts"): self.add_contact,
+            ("DELETE", "contacts"): self.delete_contact,
+            ("GET", "birthdays"): self.birthdays,
+            ("GET", "notes"): self.get_notes,
+            ("POST", "notes"): self.add_note,
+            ("DELETE", "notes"): self.delete_note,
+        }
+
+    async def run(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        resource, _, key = url.path.strip("/").partition("/")
+        handler = self.routes.get((method, resource))
+        if handler is None:
+            if any(route == resource for _, route in self.routes):
+                raise HTTPError(405, f"{method} is not supported on /{resource}")
+            raise HTTPError(404, f"No such resource /{resource}")
+        data = None
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                raise HTTPError(400, "The request body is not valid JSON")
+        if method == "GET":
+            # A write may start between set() and this task resuming
+            while not self.idle.is_set():
+                await self.idle.wait()
+            # The read handlers don't await, no write starts before they return
+            return await handler(unquote(key), parse_qs(url.query), data)
+        async with self.lock:
+            return await handler(unquote(key), parse_qs(url.query), data)
+
+    async def _write(self, change, *args):
+        """Run change(*args) on a worker thread, so its journal fsync (or fold) doesn't stall the loop."""
+        if not self.threaded:
+            return change(*args)
+        self.idle.clear()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, change, *args)
+        finally:
+            self.idle.set()
+
+    async def save(self) -> list:
+        """Save the book once no request uses it; returns the conflicts, see handlers.save_data."""
+        async with self.lock:
+            return await self._write(handlers.save_data, self.book)
+
+    async def get_contacts(self, name, query, data):
+        if name:
+            record = self.book.find_contact(name)
+            if record is None:
+                raise HTTPError(404, f"Contact {name} doesn't exist")
+            return 200, record.to_dict()
+        if "fuzzy" in query:
+            records = self.book.fuzzy_contacts(query["fuzzy"][0], _int(query, "distance", 2), _int(query, "limit", 10))
+            return 200, [record.to_dict() for record in records]
+        records = self.book.search_contacts(query.get("q", [""])[0], _int(query, "limit", None))
+        return 200, [record.to_dict() for record in records]
+
+    async def birthdays(self, name, query, data):
+        return 200, self.book.get_upcoming_birthdays(_int(query, "days", 7))
+
+    async def get_notes(self, title, query, data):
+        if title:
+            note = self.book.find_note(title)
+            if note is None:
+                raise HTTPError(404, f"Note {title} was not found")
+            return 200, note.to_dict()
+        if "tag" in query:
+            titles = self.book.find_note_titles_by_tags(query["tag"], match_all=query.get("all") == ["1"])
+            notes = [self.book.notes[title] for title in sorted(titles)]
+        elif "rank" in query:
+            notes = self.book.rank_notes(query["rank"][0], _int(query, "limit", 10))
+        elif "text" in query:
+            notes = self.book.notes_by_text(query["text"][0])
+        else:
+            raise HTTPError(400, "Give text, tag or rank")
+        return 200, [note.to_dict() for note in notes]
+
+    async def add_contact(self, name, query, data):
+        if not isinstance(data, dict) or not data.get("name"):
+            raise HTTPError(400, "Send a JSON object with at least a name")
+        _check_strings(data, CONTACT_FIELDS)
+        record = Record.from_dict({field: data.get(field) for field in CONTACT_FIELDS})
+        await self._write(self.book.add_contact, record)
+        return 201, record.to_dict()
+
+    async def delete_contact(self, name, query, data):
+        record = self.book.find_contact(name)
+        if record is None:
+            raise HTTPError(404, f"Contact {name} doesn't exist")
+        await self._write(self.book.delete_contact, record.name.value)
+        return 200, record.to_dict()
+
+    async def add_note(self, title, query, data):
+        if not isinstance(data, dict) or not data.get("title"):
+            raise HTTPError(400, "Send a JSON object with a title, value and optional tags")
+        _check_strings(data, ("title", "value"))
+        tags = data.get("tags") or []
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise HTTPError(400, "tags must be a list of strings")
+        note = Note(data["title"], data.get("value") or "", list(tags))
+        await self._write(self.book.add_note, note)
+        return 201, note.to_dict()
+
+    async def delete_note(self, title, query, data):
+        if title not in self.book.notes:
+            raise HTTPError(404, f"Note {title} was not found")
+        note = await self._write(self.book.delete_note, title)
+        return 200, note.to_dict()
+
+
+async def read_request(reader: asyncio.StreamReader):
+    """(method, target, keep_alive, body), or None when the client closed the connection."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(413, "Request head too large")
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = request_line.split(" ")
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers = {}
+    for line in header_lines:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY:
+        raise HTTPError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    return method, target, keep_alive, body
+
+
+def response(status: int, payload, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+def connection_handler(api: OrganizerAPI):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    method, target, keep_alive, body = request
+                    status, payload = await api.run(method, target, body)
+                except HTTPError as e:
+                    # keep_alive is still False when the request itself could not be read
+                    status, payload = e.status, {"error": str(e)}
+                except (KeyError, ValueError) as e:
+                    # Raised by the Organizer, e.g. a duplicate name or an invalid phone number
+                    status, payload = 400, {"error": e.args[0] if e.args else str(e)}
+                except Exception:
+                    # A bug: log it and answer rather than drop the connection
+                    traceback.print_exc()
+                    status, payload = 500, {"error": "Internal server error"}
+                writer.write(response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(book, host: str = "127.0.0.1", port: int = DEFAULT_PORT, unix: str = None):
+    api = OrganizerAPI(book)
+    handle = connection_handler(api)
+    if unix:
+        server = await asyncio.start_unix_server(handle, unix, limit=MAX_HEAD)
+    else:
+        server = await asyncio.start_server(handle, host, port, limit=MAX_HEAD)
+    where = unix or ":".join(str(part) for part in server.sockets[0].getsockname()[:2])
+    print(f"organizer-serve listening on {where}", flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    async with server:
+        await stop.wait()
+    # Writes were journaled as they came; this only writes a snapshot if the layout changed
+    for line in handlers.format_conflicts(await api.save()):
+        print(line)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="organizer-serve", description="Serve the organizer as a local JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--backend", choices=tuple(handlers.BACKENDS),
+                        default=os.environ.get("ORGANIZER_BACKEND", "pickle"))
+    args = parser.parse_args(argv)
+
+    book = handlers.load_data(backend=args.backend)
+    asyncio.run(serve(book, args.host, args.port, args.unix))
+
+
+if __name__ == "__main__":
+    main()
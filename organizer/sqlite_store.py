@@ -0,0 +1,454 @@
+"""Organizer backed by a SQLite file: contacts and notes are read on demand, not held in memory."""
+import sqlite3
+from collections.abc import Mapping
+from datetime import date
+from typing import Optional
+
+from organizer.entities import INDENT, Note, Organizer, Record, calendar_day
+from organizer.indexes import BKTree, tokenize
+from organizer import profiling
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    name TEXT PRIMARY KEY,
+    name_fold TEXT NOT NULL,
+    phone TEXT,
+    phone_key TEXT,
+    phone_reversed TEXT,
+    birthday TEXT,
+    calendar_day INTEGER,
+    email TEXT,
+    address TEXT
+);
+CREATE INDEX IF NOT EXISTS contacts_name_fold ON contacts (name_fold);
+CREATE INDEX IF NOT EXISTS contacts_phone_key ON contacts (phone_key);
+CREATE INDEX IF NOT EXISTS contacts_phone_reversed ON contacts (phone_reversed);
+CREATE INDEX IF NOT EXISTS contacts_calendar_day ON contacts (calendar_day);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS note_tags (
+    note_id INTEGER NOT NULL REFERENCES notes (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    tag_lower TEXT NOT NULL,
+    PRIMARY KEY (note_id, position)
+);
+CREATE INDEX IF NOT EXISTS note_tags_tag_lower ON note_tags (tag_lower);
+
+-- rowid is notes.id; text is "title content" as searched by find_notes_by_text
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5 (text, tags, tokenize = 'trigram');
+"""
+
+CONTACT_COLUMNS = "rowid, name, phone, birthday, email, address"
+
+
+def _contact_row(record: Record) -> dict:
+    data = record.to_dict()
+    phone_key = data["phone"].strip() if data["phone"] else None
+    bd = record.birthday.value if record.birthday else None
+    data.update(
+        name_fold=data["name"].casefold(),
+        phone_key=phone_key,
+        phone_reversed=phone_key[::-1] if phone_key else None,
+        calendar_day=calendar_day(bd.month, bd.day) if bd else None,
+    )
+    return data
+
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+class _Contacts(Mapping):
+    """Read-only name -> Record view of the contacts table, in insertion order."""
+
+    def __init__(self, book: 'SqliteOrganizer'):
+        self._book = book
+
+    def __getitem__(self, name: str) -> Record:
+        row = self._book._db.execute(f"SELECT {CONTACT_COLUMNS} FROM contacts WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return self._book._record(row)
+
+    def __contains__(self, name) -> bool:
+        return self._book._db.execute("SELECT 1 FROM contacts WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        for (name,) in self._book._db.execute("SELECT name FROM contacts ORDER BY rowid"):
+            yield name
+
+    def __len__(self) -> int:
+        return self._book._db.execute("SELECT count(*) FROM contacts").fetchone()[0]
+
+    def values(self):
+        for row in self._book._db.execute(f"SELECT {CONTACT_COLUMNS} FROM contacts ORDER BY rowid"):
+            yield self._book._record(row)
+
+    def items(self):
+        for record in self.values():
+            yield record.name.value, record
+
+
+class _Notes(Mapping):
+    """Read-only title -> Note view of the notes table, in insertion order."""
+
+    def __init__(self, book: 'SqliteOrganizer'):
+        self._book = book
+
+    def __getitem__(self, title: str) -> Note:
+        row = self._book._db.execute("SELECT id, title, value FROM notes WHERE title = ?", (title,)).fetchone()
+        if row is None:
+            raise KeyError(title)
+        return self._book._note(row)
+
+    def __contains__(self, title) -> bool:
+        return self._book._db.execute("SELECT 1 FROM notes WHERE title = ?", (title,)).fetchone() is not None
+
+    def __iter__(self):
+        for (title,) in self._book._db.execute("SELECT title FROM notes ORDER BY id"):
+            yield title
+
+    def __len__(self) -> int:
+        return self._book._db.execute("SELECT count(*) FROM notes").fetchone()[0]
+
+    def values(self):
+        for row in self._book._db.execute("SELECT id, title, value FROM notes ORDER BY id"):
+            yield self._book._note(row)
+
+    def items(self):
+        for note in self.values():
+            yield note.title.value, note
+
+
+class SqliteOrganizer(Organizer):
+    """Organizer whose contacts and notes live in a SQLite database.
+
+    Records and notes handed out are detached copies of rows; their setters
+    report back through the usual change hooks and are written immediately.
+    """
+
+    def __init__(self, path: str = "organizer.db"):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.executescript(SCHEMA)
+        super().__init__()
+        self.contacts = _Contacts(self)
+        self.notes = _Notes(self)
+
+    def _build_indexes(self):
+        # Everything is indexed by SQLite; only the NumPy snapshot and, once a fuzzy
+        # search asked for it, the BK-tree over name_fold are kept in memory
+        self._birthday_array = None
+        self._name_tree = None
+        self._name_tree_version = None
+
+    def _record(self, row) -> Record:
+        _, name, phone, birthday, email, address = row
+        record = Record.from_dict({"name": name, "phone": phone, "birthday": birthday,
+                                   "email": email, "address": address})
+        record._book = self
+        return record
+
+    def _note(self, row) -> Note:
+        note_id, title, value = row
+        tags = [tag for (tag,) in self._db.execute(
+            "SELECT tag FROM note_tags WHERE note_id = ? ORDER BY position", (note_id,))]
+        note = Note(title, value, tags)
+        note._book = self
+        return note
+
+    def iter_contacts(self, offset: int = 0, limit: Optional[int] = None):
+        rows = self._db.execute(f"SELECT {CONTACT_COLUMNS} FROM contacts ORDER BY rowid LIMIT ? OFFSET ?",
+                                (-1 if limit is None else limit, offset))
+        return (self._record(row) for row in rows)
+
+    def iter_notes(self, offset: int = 0, limit: Optional[int] = None):
+        rows = self._db.execute("SELECT id, title, value FROM notes ORDER BY id LIMIT ? OFFSET ?",
+                                (-1 if limit is None else limit, offset))
+        return ((position, self._note(row)) for position, row in enumerate(rows, offset))
+
+    def _note_id(self, title: str) -> Optional[int]:
+        row = self._db.execute("SELECT id FROM notes WHERE title = ?", (title,)).fetchone()
+        return row[0] if row else None
+
+    def _write_tags(self, note_id: int, tags: list):
+        self._db.execute("DELETE FROM note_tags WHERE note_id = ?", (note_id,))
+        self._db.executemany(
+            "INSERT INTO note_tags (note_id, position, tag, tag_lower) VALUES (?, ?, ?, ?)",
+            [(note_id, position, tag, tag.lower()) for position, tag in enumerate(tags)])
+
+    def _write_fts(self, note_id: int, note: Note):
+        self._db.execute("DELETE FROM notes_fts WHERE rowid = ?", (note_id,))
+        self._db.execute("INSERT INTO notes_fts (rowid, text, tags) VALUES (?, ?, ?)",
+                         (note_id, note.search_text(), ' '.join(note.tags)))
+
+    # Change hooks
+    def _record_changed(self, record: Record, field: str, old):
+        with self._db:
+            self._db.execute(
+                "UPDATE contacts SET phone = :phone, phone_key = :phone_key, phone_reversed = :phone_reversed, "
+                "birthday = :birthday, calendar_day = :calendar_day, email = :email, address = :address "
+                "WHERE name = :name", _contact_row(record))
+        if field == 'birthday':
+            self._birthday_array = None
+
+    def _note_changed(self, note: Note, field: str, old):
+        title = note.title.value
+        with self._db:
+            if field == 'title':
+                if old.value == title:
+                    return
+                if title in self.notes:
+                    note._title = old
+                    raise KeyError(f"The {title} is already in list of notes")
+                note_id = self._note_id(old.value)
+                self._db.execute("UPDATE notes SET title = ? WHERE id = ?", (title, note_id))
+            else:
+                note_id = self._note_id(title)
+                if field == 'value':
+                    self._db.execute("UPDATE notes SET value = ? WHERE id = ?", (note.value, note_id))
+                elif field == 'tags':
+                    self._write_tags(note_id, note.tags)
+            self._write_fts(note_id, note)
+
+    # Contact methods
+    def add_contact(self, record: Record):
+        if not isinstance(record, Record):
+            raise ValueError(f"The {record} is not instance of Record")
+        try:
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO contacts (name, name_fold, phone, phone_key, phone_reversed, birthday, "
+                    "calendar_day, email, address) VALUES (:name, :name_fold, :phone, :phone_key, "
+                    ":phone_reversed, :birthday, :calendar_day, :email, :address)", _contact_row(record))
+        except sqlite3.IntegrityError:
+            raise KeyError(f"The {record.name.value} is already in contact list")
+        record._book = self
+        if record.birthday:
+            self._birthday_array = None
+        if self._name_tree is not None:
+            self._name_tree.add(record.name.value.casefold())
+
+    def add_contacts(self, records) -> list:
+        rejected = []
+        with self._db:
+            for record in records:
+                try:
+                    self._db.execute(
+                        "INSERT INTO contacts (name, name_fold, phone, phone_key, phone_reversed, birthday, "
+                        "calendar_day, email, address) VALUES (:name, :name_fold, :phone, :phone_key, "
+                        ":phone_reversed, :birthday, :calendar_day, :email, :address)", _contact_row(record))
+                except sqlite3.IntegrityError:
+                    rejected.append((record, f"The {record.name.value} is already in contact list"))
+                    continue
+                record._book = self
+                if self._name_tree is not None:
+                    self._name_tree.add(record.name.value.casefold())
+        self._birthday_array = None
+        return rejected
+
+    def find_contact(self, name: str) -> Optional[Record]:
+        row = self._db.execute(f"SELECT {CONTACT_COLUMNS} FROM contacts WHERE name_fold = ? ORDER BY rowid LIMIT 1",
+                               (name.casefold(),)).fetchone()
+        if row:
+            return self._record(row)
+
+    def _name_tree_index(self) -> BKTree:
+        # data_version changes when another connection commits, which may have added or deleted contacts
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if self._name_tree is None or version != self._name_tree_version:
+            rows = self._db.execute("SELECT DISTINCT name_fold FROM contacts")
+            self._name_tree = BKTree(folded for (folded,) in rows)
+            self._name_tree_version = version
+        return self._name_tree
+
+    def _contacts_named(self, folded: str) -> list:
+        rows = self._db.execute(f"SELECT {CONTACT_COLUMNS} FROM contacts WHERE name_fold = ? ORDER BY rowid",
+                                (folded,))
+        return [self._record(row) for row in rows]
+
+    def find_by_phone(self, number: str, suffix: bool = False) -> list:
+        number = number.strip()
+        if not suffix:
+            rows = self._db.execute(f"SELECT {CONTACT_COLUMNS} FROM contacts WHERE phone_key = ? ORDER BY rowid",
+                                    (number,))
+        elif not number:
+            return []
+        else:
+            reversed_number = number[::-1]
+            upper = reversed_number[:-1] + chr(ord(reversed_number[-1]) + 1)
+            rows = self._db.execute(f"SELECT {CONTACT_COLUMNS} FROM contacts "
+                                    "WHERE phone_reversed >= ? AND phone_reversed < ? ORDER BY rowid",
+                                    (reversed_number, upper))
+        return [self._record(row) for row in rows]
+
+    def delete_contact(self, name: str) -> Optional[Record]:
+        try:
+            record = self.contacts[name]
+        except KeyError:
+            raise KeyError(f'{name} is absent in contact list')
+        with self._db:
+            self._db.execute("DELETE FROM contacts WHERE name = ?", (name,))
+        record._book = None
+        self._birthday_array = None
+        folded = name.casefold()
+        if self._name_tree is not None and not self._contacts_named(folded):
+            self._name_tree.remove(folded)
+        return record
+
+    def _birthday_count(self) -> int:
+        return self._db.execute("SELECT count(*) FROM contacts WHERE calendar_day IS NOT NULL").fetchone()[0]
+
+    def _birthday_entries(self) -> list:
+        return self._db.execute("SELECT calendar_day, rowid, name FROM contacts "
+                                "WHERE calendar_day IS NOT NULL ORDER BY calendar_day, rowid").fetchall()
+
+    def _birthdays_between(self, low: int, high: int):
+        rows = self._db.execute("SELECT rowid, name, birthday FROM contacts WHERE calendar_day BETWEEN ? AND ? "
+                                "ORDER BY calendar_day, rowid", (low, high)).fetchall()
+        for seq, name, birthday in rows:
+            day, month, year = map(int, birthday.split('.'))
+            yield seq, name, date(year, month, day)
+
+    # Note methods
+    def add_note(self, note: Note):
+        if not isinstance(note, Note):
+            raise ValueError(f"The {note} is not instance of Note")
+        try:
+            with self._db:
+                note_id = self._db.execute("INSERT INTO notes (title, value) VALUES (?, ?)",
+                                           (note.title.value, note.value)).lastrowid
+                self._write_tags(note_id, note.tags)
+                self._write_fts(note_id, note)
+        except sqlite3.IntegrityError:
+            raise KeyError(f"The {note.title.value} is already in list of notes")
+        note._book = self
+
+    def find_note(self, title: str) -> Optional[Note]:
+        if title in self.notes:
+            return self.notes[title]
+
+    def _remove_note(self, title: str) -> Note:
+        note = self.notes[title]
+        note_id = self._note_id(title)
+        with self._db:
+            self._db.execute("DELETE FROM notes_fts WHERE rowid = ?", (note_id,))
+            self._db.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+        note._book = None
+        return note
+
+    def _note_ids_by_text(self, text: str) -> list:
+        query = text.lower()
+        if len(query) >= 3:
+            rows = self._db.execute("SELECT rowid, text FROM notes_fts WHERE text MATCH ? ORDER BY rowid",
+                                    (_fts_phrase(query),))
+        else:
+            rows = self._db.execute("SELECT rowid, text FROM notes_fts ORDER BY rowid")
+        return [note_id for note_id, search_text in rows if query in search_text]
+
+    def _notes_by_ids(self, note_ids) -> list:
+        notes = []
+        for note_id in note_ids:
+            row = self._db.execute("SELECT id, title, value FROM notes WHERE id = ?", (note_id,)).fetchone()
+            notes.append(self._note(row))
+        return notes
+
+    def notes_by_text(self, text: str) -> list:
+        return self._notes_by_ids(self._note_ids_by_text(text))
+
+    def find_notes_by_text(self, text: str):
+        found_notes = [f"{' ' * INDENT}{str(note)}" for note in self.notes_by_text(text)]
+        if found_notes:
+            return found_notes
+
+    def _note_ids_by_tag(self, text: str) -> list:
+        # Substring matching runs over the distinct tags (read from the index), not over notes
+        query = text.lower()
+        tags = [tag for (tag,) in self._db.execute("SELECT DISTINCT tag_lower FROM note_tags") if query in tag]
+        if not tags:
+            return []
+        placeholders = ', '.join('?' * len(tags))
+        rows = self._db.execute(f"SELECT DISTINCT note_id FROM note_tags WHERE tag_lower IN ({placeholders}) "
+                                "ORDER BY note_id", tags)
+        return [note_id for (note_id,) in rows]
+
+    def _titles_by_tag(self, text: str) -> set:
+        return {note.title.value for note in self._notes_by_ids(self._note_ids_by_tag(text))}
+
+    def notes_by_tag(self, text: str) -> list:
+        return self._notes_by_ids(self._note_ids_by_tag(text))
+
+    def find_notes_by_tags(self, text: str):
+        found_notes = [f"{' ' * INDENT}{str(note)}" for note in self.notes_by_tag(text)]
+        if found_notes:
+            return found_notes
+
+    def rank_notes(self, text: str, limit: int = 10) -> list:
+        # The trigram tokenizer only matches words of three or more characters
+        words = [word for word in tokenize(text) if len(word) >= 3]
+        if not words or limit <= 0:
+            return []
+        rows = self._db.execute("SELECT rowid FROM notes_fts WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts) LIMIT ?",
+                                (' OR '.join(_fts_phrase(word) for word in words), limit))
+        return self._notes_by_ids(note_id for (note_id,) in rows)
+
+    # Persistence
+    def copy_from(self, book: Organizer):
+        """Bulk-insert every contact and note of another Organizer, updating the ones already here.
+
+        Everything is written in one transaction; rows that already exist keep their id, so the
+        insertion order survives a second migration.
+        """
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO contacts (name, name_fold, phone, phone_key, phone_reversed, birthday, "
+                "calendar_day, email, address) VALUES (:name, :name_fold, :phone, :phone_key, "
+                ":phone_reversed, :birthday, :calendar_day, :email, :address) "
+                "ON CONFLICT (name) DO UPDATE SET phone = excluded.phone, phone_key = excluded.phone_key, "
+                "phone_reversed = excluded.phone_reversed, birthday = excluded.birthday, "
+                "calendar_day = excluded.calendar_day, email = excluded.email, address = excluded.address",
+                (_contact_row(record) for record in book.contacts.values()))
+            for note in book.notes.values():
+                self._db.execute("INSERT INTO notes (title, value) VALUES (?, ?) "
+                                 "ON CONFLICT (title) DO UPDATE SET value = excluded.value",
+                                 (note.title.value, note.content()))
+                note_id = self._note_id(note.title.value)
+                self._write_tags(note_id, note.tags)
+                self._write_fts(note_id, note)
+        self._birthday_array = None
+        self._name_tree = None
+        return self
+
+    def to_organizer(self) -> Organizer:
+        """Load the whole database into a plain in-memory Organizer."""
+        book = Organizer()
+        for record in self.contacts.values():
+            record._book = None
+            book.add_contact(record)
+        for note in self.notes.values():
+            note._book = None
+            book.add_note(note)
+        return book
+
+    def save(self, filename=None):
+        self._db.commit()
+
+    @classmethod
+    def load(cls, filename="organizer.db", journal: bool = False):
+        return cls(filename)
+
+    def close(self):
+        self._db.close()
+
+    def __getstate__(self):
+        raise TypeError("SqliteOrganizer is stored in its database, use to_organizer() for a picklable copy")
+
+
+# Profiling enabled before this module was imported (e.g. by load_data) covers it too
+profiling.instrument(SqliteOrganizer)
@@ -1,30 +1,125 @@
 import re
+from calendar import isleap
+from datetime import date
 from typing import Optional
 
+PHONE_PATTERN = re.compile(r'[0-9]{10}')
+EMAIL_PATTERN = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w{2,}$')
+# DD.MM.YYYY as strptime's %d.%m.%Y matches it: single-digit or space-padded day,
+# single-digit month, and any Unicode decimal digits
+DATE_PATTERN = re.compile(r'(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])\.(1[0-2]|0[1-9]|[1-9])\.(\d\d\d\d)')
+
+LENGTH_ERROR = 'Value is too short, need more than 0 symbol'
+PHONE_ERROR = 'The "phone number" field must contain 10 digits'
+EMAIL_ERROR = "Invalid email format."
+DATE_ERROR = "Invalid date format. Use DD.MM.YYYY"
+ADDRESS_ERROR = "Value has to be more than 4 letters"
+
+MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
 
 def length_validator(value: str) -> Optional[str]:
     if len(value) == 0:
-        raise ValueError('Value is too short, need more than 0 symbol')
+        raise ValueError(LENGTH_ERROR)
     else:
         return value
 
 
 def phone_number_validator(pattern, number: str) -> Optional[str]:
+    # pattern may be a string or a compiled PHONE_PATTERN
     if re.fullmatch(pattern, number.strip()):
         return number
     else:
-        raise ValueError('The "phone number" field must contain 10 digits')
+        raise ValueError(PHONE_ERROR)
 
 
 def email_validator(pattern: str, email: str) -> str:
     if re.fullmatch(pattern, email.strip()):
         return email.strip()
     else:
-        raise ValueError("Invalid email format.")
+        raise ValueError(EMAIL_ERROR)
 
 
 def address_validator(value: str) -> Optional[str]:
     if len(value) < 4:
-        raise ValueError("Value has to be more than 4 letters")
+        raise ValueError(ADDRESS_ERROR)
     else:
-        return value 
\ No newline at end of file
+        return value
+
+
+def validate_phone(number: str) -> str:
+    if PHONE_PATTERN.fullmatch(number.strip()):
+        return number
+    raise ValueError(PHONE_ERROR)
+
+
+def validate_email(email: str) -> str:
+    email = email.strip()
+    if EMAIL_PATTERN.fullmatch(email):
+        return email
+    raise ValueError(EMAIL_ERROR)
+
+
+def _date_or_none(value: str) -> Optional[date]:
+    match = DATE_PATTERN.fullmatch(value)
+    if match is None:
+        return None
+    day, month, year = int(match[1]), int(match[2]), int(match[3])
+    if not 1 <= month <= 12 or year < 1:
+        return None
+    last_day = 29 if month == 2 and isleap(year) else MONTH_DAYS[month - 1]
+    if not 1 <= day <= last_day:
+        return None
+    return date(year, month, day)
+
+
+def parse_date(value: str) -> date:
+    """DD.MM.YYYY to a date; a regex and a calendar check instead of datetime.strptime."""
+    parsed = _date_or_none(value)
+    if parsed is None:
+        raise ValueError(DATE_ERROR)
+    return parsed
+
+
+# Batch validators: one result per value, (value, None) when valid and
+# (None, message) when not, so a bad row costs no exception. Empty optional
+# values give (None, None).
+
+def validate_lengths(values: list) -> list:
+    return [(value, None) if value else (None, LENGTH_ERROR) for value in values]
+
+
+def validate_phones(numbers: list) -> list:
+    fullmatch = PHONE_PATTERN.fullmatch
+    return [(None, None) if not number else (number, None) if fullmatch(number.strip()) else (None, PHONE_ERROR)
+            for number in numbers]
+
+
+def validate_emails(emails: list) -> list:
+    fullmatch = EMAIL_PATTERN.fullmatch
+    results = []
+    for email in emails:
+        email = email.strip() if email else email
+        if not email:
+            results.append((None, None))
+        elif fullmatch(email):
+            results.append((email, None))
+        else:
+            results.append((None, EMAIL_ERROR))
+    return results
+
+
+def validate_dates(values: list) -> list:
+    results = []
+    for value in values:
+        if not value:
+            results.append((None, None))
+            continue
+        parsed = _date_or_none(value)
+        results.append((parsed, None) if parsed is not None else (None, DATE_ERROR))
+    return results
+
+
+def validate_addresses(values: list) -> list:
+    return [(None, None) if not value else (value, None) if len(value) >= 4 else (None, ADDRESS_ERROR)
+            for value in values]
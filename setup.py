@@ -7,10 +7,18 @@ setup(
     install_requires=[
         "colorama",
     ],
+    extras_require={
+        "numpy": ["numpy"],
+    },
     entry_points={
         'console_scripts': [
             'organizer=organizer.main:main',
-            'organizer-seed=organizer.seed:seed_demo_data',
+            'organizer-seed=organizer.seed:main',
+            'organizer-import=organizer.importer:main',
+            'organizer-export=organizer.export:main',
+            'organizer-bench=organizer.benchmark:main',
+            'organizer-serve=organizer.server:main',
+            'organizer-loadgen=organizer.loadgen:main',
         ],
     },
     author="spro77",
@@ -0,0 +1,81 @@
+"""Fuzzy name search: the bit-parallel edit distance and the BK-tree against the textbook versions."""
+import random
+import unittest
+
+from organizer.entities import Organizer, Record
+from organizer.indexes import char_masks, edit_distance
+from organizer.sqlite_store import SqliteOrganizer
+
+
+def levenshtein(a: str, b: str) -> int:
+    row = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, other in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (char != other))
+    return row[-1]
+
+
+def random_name(rng: random.Random) -> str:
+    return "".join(rng.choice("aeinAN") for _ in range(rng.randint(1, 7)))
+
+
+class EditDistanceTest(unittest.TestCase):
+    def test_matches_levenshtein(self):
+        rng = random.Random(25)
+        for _ in range(3000):
+            a = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 12)))
+            b = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 12)))
+            self.assertEqual(edit_distance(a, b), levenshtein(a, b), (a, b))
+            self.assertEqual(edit_distance(a, b, char_masks(a)), levenshtein(a, b), (a, b))
+
+    def test_long_patterns(self):
+        rng = random.Random(26)
+        for _ in range(200):
+            a = "".join(rng.choice("ab") for _ in range(rng.randint(60, 90)))
+            b = "".join(rng.choice("ab") for _ in range(rng.randint(0, 90)))
+            self.assertEqual(edit_distance(a, b), levenshtein(a, b))
+
+
+class FuzzyContactsTest(unittest.TestCase):
+    def new_book(self):
+        return Organizer()
+
+    def setUp(self):
+        self.book = self.new_book()
+
+    def tearDown(self):
+        if isinstance(self.book, SqliteOrganizer):
+            self.book.close()
+
+    def scan(self, name: str, max_distance: int, limit: int) -> list:
+        query = name.casefold()
+        scored = [(levenshtein(query, record.name.value.casefold()), record.name.value.casefold(), record.name.value)
+                  for record in self.book.contacts.values()]
+        # sorted() is stable: names that fold alike stay in insertion order
+        return [name for distance, _, name in sorted(scored, key=lambda score: score[:2])
+                if distance <= max_distance][:limit]
+
+    def test_matches_a_scan_of_every_contact(self):
+        rng = random.Random(25)
+        for _ in range(300):
+            names = list(self.book.contacts)
+            if names and rng.random() < 0.3:
+                self.book.delete_contact(rng.choice(names))
+            else:
+                name = random_name(rng)
+                if name not in self.book.contacts:
+                    self.book.add_contact(Record(name))
+            for _ in range(3):
+                query, max_distance, limit = random_name(rng), rng.randint(0, 3), rng.randint(1, 6)
+                found = [record.name.value for record in self.book.fuzzy_contacts(query, max_distance, limit)]
+                self.assertEqual(found, self.scan(query, max_distance, limit), (query, max_distance, limit))
+
+
+class SqliteFuzzyContactsTest(FuzzyContactsTest):
+    def new_book(self):
+        return SqliteOrganizer(":memory:")
+
+
+if __name__ == "__main__":
+    unittest.main()
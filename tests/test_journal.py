@@ -0,0 +1,82 @@
+"""The change journal: replayed on top of the snapshot at load, folded into it every COMPACT_EVERY entries."""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from organizer.entities import Note, Organizer, Record
+from organizer.journal import journal_path
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "organizer.pkl")
+        book = Organizer()
+        book.add_contact(Record("Cid"))
+        book.add_contact(Record("Dan"))
+        book.save(self.path)
+        self.books = []
+
+    def tearDown(self):
+        for book in self.books:
+            book._journal.close()
+        self.directory.cleanup()
+
+    def load(self) -> Organizer:
+        book = Organizer.load(self.path, journal=True)
+        self.books.append(book)
+        return book
+
+    def change(self, book: Organizer):
+        book.contacts["Cid"].phone = "1234567890"
+        book.add_contact(Record("Eve"))
+        book.delete_contact("Dan")
+        book.add_note(Note("Plans", "Call Eve", ["todo"]))
+
+    def assertChanged(self, book: Organizer):
+        self.assertEqual(list(book.contacts), ["Cid", "Eve"])
+        self.assertEqual(book.contacts["Cid"].phone.value, "1234567890")
+        self.assertEqual(list(book.notes), ["Plans"])
+        self.assertEqual(book.notes["Plans"].tags, ["todo"])
+
+    def test_changes_are_replayed_on_top_of_the_snapshot(self):
+        self.change(self.load())
+
+        self.assertEqual(list(Organizer.load(self.path).contacts), ["Cid", "Dan"])
+        self.assertChanged(self.load())
+
+    def test_half_written_last_line_is_skipped(self):
+        self.change(self.load())
+        with open(journal_path(self.path), "a", encoding="utf-8") as f:
+            f.write('{"op": "add_contact", "rec')
+
+        self.assertChanged(self.load())
+
+    def test_replay_after_a_crash_between_snapshot_and_truncate(self):
+        book = self.load()
+        self.change(book)
+        kept = os.path.join(self.directory.name, "kept.journal")
+        shutil.copy(journal_path(self.path), kept)
+        book.save(self.path)
+        # As if the process died before the journal was removed
+        shutil.copy(kept, journal_path(self.path))
+
+        self.assertChanged(self.load())
+
+    def test_journal_is_folded_into_the_snapshot_at_compact_every(self):
+        with mock.patch("organizer.entities.COMPACT_EVERY", 3):
+            book = self.load()
+            book.add_contact(Record("Eve"))
+            book.add_contact(Record("Fay"))
+            self.assertTrue(os.path.exists(journal_path(self.path)))
+            book.add_contact(Record("Gus"))
+
+        self.assertFalse(os.path.exists(journal_path(self.path)))
+        self.assertEqual(book._journal.entries, 0)
+        self.assertEqual(list(Organizer.load(self.path).contacts), ["Cid", "Dan", "Eve", "Fay", "Gus"])
+
+
+if __name__ == "__main__":
+    unittest.main()
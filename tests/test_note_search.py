@@ -0,0 +1,75 @@
+"""Note search through the n-gram and tag indexes agrees with a scan of every note."""
+import random
+import unittest
+
+from organizer.entities import Note, Organizer
+from organizer.sqlite_store import SqliteOrganizer
+
+ALPHABET = "abcAB "
+
+
+def words(rng: random.Random, longest: int) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, longest))).strip() or "a"
+
+
+class NoteSearchTest(unittest.TestCase):
+    def new_book(self):
+        return Organizer()
+
+    def setUp(self):
+        self.book = self.new_book()
+
+    def tearDown(self):
+        if isinstance(self.book, SqliteOrganizer):
+            self.book.close()
+
+    def change(self, rng: random.Random):
+        notes = list(self.book.notes.values())
+        action = rng.choice(("add", "add", "rename", "edit", "tag", "untag", "delete")) if notes else "add"
+        note = rng.choice(notes) if notes else None
+        try:
+            if action == "add":
+                tags = [words(rng, 4) for _ in range(rng.randint(0, 3))]
+                self.book.add_note(Note(words(rng, 6), words(rng, 12), list(dict.fromkeys(tags))))
+            elif action == "rename":
+                note.title = words(rng, 6)
+            elif action == "edit":
+                note.value = words(rng, 12)
+            elif action == "tag":
+                note.add_tag(words(rng, 4))
+            elif action == "untag" and note.tags:
+                note.remove_tag(rng.randrange(len(note.tags)))
+            elif action == "delete":
+                self.book.delete_note(note.title.value)
+        except (KeyError, ValueError):
+            # A title that is taken already, or a tag the note has
+            pass
+
+    def check(self, rng: random.Random):
+        notes = list(self.book.notes.values())
+        for _ in range(5):
+            query = words(rng, 4)
+            expected = [note.title.value for note in notes if query.lower() in note.search_text()]
+            self.assertEqual([note.title.value for note in self.book.notes_by_text(query)], expected, query)
+
+            queries = [words(rng, 3) for _ in range(rng.randint(1, 2))]
+            tagged = [{note.title.value for note in notes if any(q.lower() in tag.lower() for tag in note.tags)}
+                      for q in queries]
+            self.assertEqual(self.book.find_note_titles_by_tags(queries), set().union(*tagged), queries)
+            self.assertEqual(self.book.find_note_titles_by_tags(queries, match_all=True),
+                             set.intersection(*tagged), queries)
+
+    def test_search_matches_a_scan_of_every_note(self):
+        rng = random.Random(5)
+        for _ in range(400):
+            self.change(rng)
+            self.check(rng)
+
+
+class SqliteNoteSearchTest(NoteSearchTest):
+    def new_book(self):
+        return SqliteOrganizer(":memory:")
+
+
+if __name__ == "__main__":
+    unittest.main()
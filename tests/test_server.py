@@ -0,0 +1,103 @@
+"""The JSON API's writes and shutdown save, on both storage backends."""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from organizer import handlers
+from organizer.server import OrganizerAPI
+
+
+def close(book):
+    if hasattr(book, "close"):
+        book.close()
+    elif book._journal is not None:
+        book._journal.close()
+
+
+class ServerWritesTest(unittest.TestCase):
+    backend = "pickle"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.environ = mock.patch.dict(os.environ, {"HOME": self.directory.name})
+        self.environ.start()
+        os.environ.pop("ORGANIZER_SHARDS", None)
+        self.book = handlers.load_data(backend=self.backend)
+
+    def tearDown(self):
+        close(self.book)
+        self.environ.stop()
+        self.directory.cleanup()
+
+    def run_requests(self, requests):
+        async def run():
+            api = OrganizerAPI(self.book)
+            results = [await api.run(method, target, json.dumps(data).encode() if data else b"")
+                       for method, target, data in requests]
+            await api.save()
+            return results
+        return asyncio.run(run())
+
+    def test_added_and_deleted_contacts_and_notes_are_saved(self):
+        statuses = [status for status, _ in self.run_requests([
+            ("POST", "/contacts", {"name": "Ann", "phone": "1234567890"}),
+            ("POST", "/contacts", {"name": "Bob"}),
+            ("DELETE", "/contacts/Bob", None),
+            ("POST", "/notes", {"title": "Plans", "value": "Call Ann", "tags": ["todo"]}),
+            ("POST", "/notes", {"title": "Old", "value": "Gone"}),
+            ("DELETE", "/notes/Old", None),
+            ("GET", "/contacts/Ann", None),
+        ])]
+        self.assertEqual(statuses, [201, 201, 200, 201, 201, 200, 200])
+
+        book = handlers.load_data(backend=self.backend)
+        try:
+            self.assertEqual(list(book.contacts), ["Ann"])
+            self.assertEqual(book.contacts["Ann"].phone.value, "1234567890")
+            self.assertEqual(list(book.notes), ["Plans"])
+            self.assertEqual(book.notes["Plans"].tags, ["todo"])
+        finally:
+            close(book)
+
+
+class SqliteServerWritesTest(ServerWritesTest):
+    backend = "sqlite"
+
+
+class ServerReadsTest(ServerWritesTest):
+    def test_reads_wait_only_for_the_write_that_is_running(self):
+        started, release = threading.Event(), threading.Event()
+        add_contact = self.book.add_contact
+
+        def slow_add_contact(record):
+            started.set()
+            release.wait(5)
+            add_contact(record)
+
+        self.book.add_contact = slow_add_contact
+
+        async def run():
+            api = OrganizerAPI(self.book)
+            loop = asyncio.get_running_loop()
+            # Held as by a write waiting for its turn: reads go ahead
+            async with api.lock:
+                self.assertEqual(await api.run("GET", "/contacts?q=", b""), (200, []))
+            write = asyncio.create_task(api.run("POST", "/contacts", json.dumps({"name": "Ann"}).encode()))
+            await loop.run_in_executor(None, started.wait, 5)
+            read = asyncio.create_task(api.run("GET", "/contacts/Ann", b""))
+            await asyncio.sleep(0.05)
+            self.assertFalse(read.done())
+            release.set()
+            await write
+            return await read
+
+        status, contact = asyncio.run(run())
+        self.assertEqual((status, contact["name"]), (200, "Ann"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Two sessions sharing one snapshot and journal, as two organizer processes would."""
+import os
+import tempfile
+import unittest
+
+from organizer.entities import Organizer, Record
+
+
+class TwoSessionsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "organizer.pkl")
+        book = Organizer()
+        book.add_contact(Record("Cid"))
+        book.add_contact(Record("Dan"))
+        book.save(self.path)
+        self.a = Organizer.load(self.path, journal=True)
+        self.b = Organizer.load(self.path, journal=True)
+
+    def tearDown(self):
+        for book in (self.a, self.b):
+            book._journal.close()
+        self.directory.cleanup()
+
+    def test_edit_of_a_contact_changed_and_saved_elsewhere_is_a_conflict(self):
+        self.b.contacts["Cid"].phone = "1111111111"
+        self.assertEqual(self.b.save(self.path, delta=True), [])
+
+        self.a.contacts["Cid"].phone = "2222222222"
+        conflicts = self.a.save(self.path, delta=True)
+
+        self.assertEqual([(kind, key) for kind, key, _ in conflicts], [("contacts", "Cid")])
+        self.assertEqual(conflicts[0][2]["phone"], "2222222222")
+        # The version saved first is kept, on disk and in the session that lost
+        self.assertEqual(self.a.contacts["Cid"].phone.value, "1111111111")
+        self.assertEqual(Organizer.load(self.path, journal=True).contacts["Cid"].phone.value, "1111111111")
+
+    def test_conflict_after_the_other_session_folded_the_journal(self):
+        self.b.contacts["Cid"].email = "b@example.com"
+        self.b.save(self.path)
+
+        self.a.contacts["Cid"].email = "a@example.com"
+
+        self.assertEqual([(kind, key) for kind, key, _ in self.a.save(self.path)], [("contacts", "Cid")])
+        self.assertEqual(Organizer.load(self.path).contacts["Cid"].email.value, "b@example.com")
+
+    def test_changes_to_different_contacts_are_merged(self):
+        self.b.contacts["Cid"].phone = "1111111111"
+        self.a.contacts["Dan"].phone = "2222222222"
+        self.a.add_contact(Record("Eve"))
+
+        self.assertEqual(self.a.save(self.path, delta=True), [])
+        self.assertEqual(self.b.save(self.path, delta=True), [])
+
+        book = Organizer.load(self.path, journal=True)
+        self.assertEqual(book.contacts["Cid"].phone.value, "1111111111")
+        self.assertEqual(book.contacts["Dan"].phone.value, "2222222222")
+        self.assertIn("Eve", book.contacts)
+        book._journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()